@@ -1,5 +1,9 @@
 from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlparse
 import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis .env
@@ -49,6 +53,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "games.context_processors.quota_usage",
             ],
         },
     },
@@ -57,13 +62,77 @@ TEMPLATES = [
 WSGI_APPLICATION = "gameforge.wsgi.application"
 
 # =====================
-# Base de données SQLite
+# Base de données
 # =====================
+# DATABASE_URL : sqlite:///db.sqlite3 (chemin relatif à BASE_DIR), sqlite:////chemin/absolu
+# ou postgres://user:mdp@hôte:5432/base?sslmode=require (paramètres passés dans OPTIONS).
+# SQLite : WAL, synchronous=NORMAL et busy_timeout appliqués à chaque connexion (games/signals.py).
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 20))
+GAMEFORGE_SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "wal"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "normal"),
+    "busy_timeout": int(SQLITE_BUSY_TIMEOUT * 1000),
+}
+
+
+def _database_from_url(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        # sqlite:///relatif -> "/relatif", sqlite:////absolu -> "//absolu"
+        path = unquote(parsed.path[1:]) or ":memory:"
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": path if path == ":memory:" or os.path.isabs(path) else BASE_DIR / path,
+            # Attente d'un verrou (secondes) avant "database is locked"
+            "OPTIONS": {"timeout": SQLITE_BUSY_TIMEOUT},
+        }
+    if parsed.scheme in ("postgres", "postgresql", "pgsql"):
+        options = dict(parse_qsl(parsed.query))
+        conn_max_age = int(os.getenv("DB_CONN_MAX_AGE", 60))
+        if os.getenv("DB_POOL", "False").lower() in ("true", "1", "yes"):
+            # Pool psycopg (psycopg[pool]) intégré à Django 5.1+, incompatible avec les connexions persistantes
+            if django.VERSION < (5, 1):
+                raise ImproperlyConfigured(f"DB_POOL nécessite Django 5.1+ (installé : {django.get_version()})")
+            options["pool"] = True
+            conn_max_age = 0
+        return {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": unquote(parsed.path[1:]),
+            "USER": unquote(parsed.username or ""),
+            "PASSWORD": unquote(parsed.password or ""),
+            "HOST": parsed.hostname or "",
+            "PORT": str(parsed.port or ""),
+            "OPTIONS": options,
+            # Connexions réutilisées entre requêtes, vérifiées avant réutilisation
+            "CONN_MAX_AGE": conn_max_age,
+            "CONN_HEALTH_CHECKS": True,
+        }
+    raise ImproperlyConfigured(f"DATABASE_URL non supportée : {parsed.scheme}://")
+
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": _database_from_url(os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")),
+}
+
+# =====================
+# Cache
+# =====================
+# CACHE_URL : locmem:// (par défaut, propre à chaque processus), file:///chemin/absolu
+# ou redis://hôte:6379/0. Avec le worker de génération ou plusieurs processus web, utiliser
+# file:// ou redis:// pour que les invalidations soient partagées.
+def _cache_from_url(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "locmem":
+        return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "gameforge"}
+    if parsed.scheme == "file":
+        return {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": unquote(parsed.path)}
+    if parsed.scheme in ("redis", "rediss"):
+        return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    raise ImproperlyConfigured(f"CACHE_URL non supportée : {parsed.scheme}://")
+
+
+CACHES = {
+    "default": {**_cache_from_url(os.getenv("CACHE_URL", "locmem://")), "KEY_PREFIX": "gameforge"},
 }
 
 # =========================
@@ -100,16 +169,111 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Encodage des images générées : "webp" ou "avif" (si Pillow le supporte), qualité 1-100
+GAMEFORGE_IMAGE_FORMAT = os.getenv("GAMEFORGE_IMAGE_FORMAT", "webp")
+GAMEFORGE_IMAGE_QUALITY = int(os.getenv("GAMEFORGE_IMAGE_QUALITY", 80))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # ====================
 # GameForge spécifiques
 # ====================
 GAMEFORGE_DAILY_LIMIT = int(os.getenv("GAMEFORGE_DAILY_LIMIT", 10))
+# Limites quotidiennes par offre : "groupe:limite,groupe:limite" (groupes Django de l'utilisateur)
+GAMEFORGE_PLAN_LIMITS = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition(":") for item in os.getenv("GAMEFORGE_PLAN_LIMITS", "").split(",") if ":" in item)
+}
+# Durée de vie (secondes) des pages publiques en cache (listes de l'accueil, détail des jeux)
+GAMEFORGE_CACHE_TIMEOUT = int(os.getenv("GAMEFORGE_CACHE_TIMEOUT", 60))
+# Nombre de jeux par page (listes paginées par curseur)
+GAMEFORGE_PAGE_SIZE = int(os.getenv("GAMEFORGE_PAGE_SIZE", 24))
+# Recherche plein texte : nombre max de résultats classés, configuration tsvector (PostgreSQL)
+GAMEFORGE_SEARCH_LIMIT = int(os.getenv("GAMEFORGE_SEARCH_LIMIT", 500))
+GAMEFORGE_SEARCH_CONFIG = os.getenv("GAMEFORGE_SEARCH_CONFIG", "french")
+# Appels LLM simultanés (tous jobs confondus) et délai max par étape, en secondes (aussi délai
+# HTTP des clients des backends remote et server : un appel bloqué libère son thread)
+GAMEFORGE_LLM_CONCURRENCY = int(os.getenv("GAMEFORGE_LLM_CONCURRENCY", 4))
+GAMEFORGE_LLM_STAGE_TIMEOUT = float(os.getenv("GAMEFORGE_LLM_STAGE_TIMEOUT", 120))
+# Bail d'un job "running" (secondes sans avancer d'étape) : au-delà, son worker est tenu pour
+# mort, le job passe en échec et sa réservation de quota est rendue
+GAMEFORGE_JOB_LEASE = int(os.getenv("GAMEFORGE_JOB_LEASE", 1800))
+# Génération du texte : "parallel" (4 appels simultanés) ou "oneshot" (un document JSON
+# unique, les sections manquantes sont regénérées à part)
+GAMEFORGE_GENERATION_MODE = os.getenv("GAMEFORGE_GENERATION_MODE", "parallel")
+if GAMEFORGE_GENERATION_MODE not in ("parallel", "oneshot"):
+    raise ImproperlyConfigured("GAMEFORGE_GENERATION_MODE doit valoir parallel ou oneshot")
+# Nombre d'aperçus d'exploration gardés prêts par le worker
+GAMEFORGE_EXPLORE_POOL_TARGET = int(os.getenv("GAMEFORGE_EXPLORE_POOL_TARGET", 5))
 
 # ====================
 # Hugging Face
 # ====================
+# Seule source des modèles utilisés par games/hf_client.py et games/backends/
 HF_TOKEN = os.getenv("HF_TOKEN", None)
 HF_TEXT_MODEL = os.getenv("HF_TEXT_MODEL", "Qwen/Qwen2.5-7B-Instruct")
-HF_IMAGE_MODEL = os.getenv("HF_IMAGE_MODEL", "stabilityai/stable-diffusion-2-1")
+# Plusieurs modèles possibles, séparés par des virgules : le premier est celui par défaut
+HF_IMAGE_MODELS = [m.strip() for m in os.getenv("HF_IMAGE_MODEL", "stabilityai/stable-diffusion-2-1").split(",") if m.strip()]
+HF_IMAGE_MODEL = HF_IMAGE_MODELS[0]
+# Budget mémoire total des pipelines diffusers chargés (Mo), au-delà on évince le moins récemment utilisé
+HF_PIPELINE_MEMORY_MB = int(os.getenv("HF_PIPELINE_MEMORY_MB", 8192))
+# Cache des réponses LLM (games/llm_cache.py) : activation, TTL (secondes), entrées en mémoire,
+# fichier SQLite partagé entre processus (vide = pas de niveau disque) et ses entrées max
+HF_CACHE = os.getenv("HF_CACHE", "True").lower() in ("true", "1", "yes")
+HF_CACHE_TTL = float(os.getenv("HF_CACHE_TTL", 7 * 24 * 3600))
+HF_CACHE_MAX_ENTRIES = int(os.getenv("HF_CACHE_MAX_ENTRIES", 512))
+HF_CACHE_DB = os.getenv("HF_CACHE_DB", str(BASE_DIR / "llm_cache.sqlite3"))
+HF_CACHE_DB_MAX_ENTRIES = int(os.getenv("HF_CACHE_DB_MAX_ENTRIES", 50_000))
+
+# Paliers de qualité des images : scheduler ("default", "dpmpp" = DPM-Solver++ Karras, "euler_a",
+# "lcm" pour un modèle distillé LCM), étapes, taille de rendu, agrandissement final (upscale),
+# slicing attention/VAE (mémoire), channels_last et torch.compile (backend diffusers)
+GAMEFORGE_TORCH_COMPILE = os.getenv("GAMEFORGE_TORCH_COMPILE", "False").lower() in ("true", "1", "yes")
+GAMEFORGE_IMAGE_TIERS = {
+    "preview": {
+        "scheduler": "dpmpp", "steps": 8, "width": 384, "height": 256, "upscale": (768, 512),
+        "attention_slicing": True, "vae_slicing": True, "channels_last": True, "compile": GAMEFORGE_TORCH_COMPILE,
+    },
+    "standard": {
+        "scheduler": "dpmpp", "steps": 20, "width": 768, "height": 512,
+        "attention_slicing": True, "vae_slicing": True, "channels_last": True, "compile": GAMEFORGE_TORCH_COMPILE,
+    },
+    "high": {
+        "scheduler": "dpmpp", "steps": 35, "width": 1024, "height": 680,
+        "attention_slicing": True, "vae_slicing": True, "channels_last": True, "compile": GAMEFORGE_TORCH_COMPILE,
+    },
+}
+# Cache des rendus à seed fixé (dossier, plafond en Mo, 0 = désactivé) et nombre d'embeddings
+# CLIP de prompts gardés par pipeline diffusers (0 = désactivé). Le dossier est hors de
+# MEDIA_ROOT, servi publiquement : les rendus de jeux privés n'y sont pas accessibles par URL
+GAMEFORGE_RENDER_CACHE_DIR = (BASE_DIR / os.getenv("GAMEFORGE_RENDER_CACHE_DIR", "render_cache")).resolve()
+if GAMEFORGE_RENDER_CACHE_DIR.is_relative_to(Path(MEDIA_ROOT).resolve()):
+    raise ImproperlyConfigured("GAMEFORGE_RENDER_CACHE_DIR ne doit pas être sous MEDIA_ROOT (servi publiquement)")
+GAMEFORGE_RENDER_CACHE_MB = int(os.getenv("GAMEFORGE_RENDER_CACHE_MB", 1024))
+GAMEFORGE_PROMPT_EMBED_CACHE = int(os.getenv("GAMEFORGE_PROMPT_EMBED_CACHE", 64))
+# Palier des créations et de l'exploration ; les jeux enregistrés peuvent être rendus en "high"
+GAMEFORGE_CREATE_IMAGE_TIER = os.getenv("GAMEFORGE_CREATE_IMAGE_TIER", "standard")
+GAMEFORGE_EXPLORE_IMAGE_TIER = os.getenv("GAMEFORGE_EXPLORE_IMAGE_TIER", "preview")
+for _tier in (GAMEFORGE_CREATE_IMAGE_TIER, GAMEFORGE_EXPLORE_IMAGE_TIER):
+    if _tier not in GAMEFORGE_IMAGE_TIERS:
+        raise ImproperlyConfigured(f"Palier d'images inconnu : {_tier} (choix : {', '.join(GAMEFORGE_IMAGE_TIERS)})")
+
+# Backends d'inférence (games/backends) : texte remote|local|fake|server, images diffusers|remote|fake|server
+GAMEFORGE_TEXT_BACKEND = os.getenv("GAMEFORGE_TEXT_BACKEND", "remote")
+GAMEFORGE_IMAGE_BACKEND = os.getenv("GAMEFORGE_IMAGE_BACKEND", "diffusers")
+# Backend texte local (transformers, CPU) : modèle et quantification none|int8|bf16
+HF_LOCAL_TEXT_MODEL = os.getenv("HF_LOCAL_TEXT_MODEL", "Qwen/Qwen2.5-1.5B-Instruct")
+HF_LOCAL_QUANTIZATION = os.getenv("HF_LOCAL_QUANTIZATION", "none").lower()
+if HF_LOCAL_QUANTIZATION not in ("none", "int8", "bf16"):
+    raise ImproperlyConfigured("HF_LOCAL_QUANTIZATION doit valoir none, int8 ou bf16")
+# Backend fake (tests de charge hors ligne) : latence simulée en secondes, par appel texte et par image
+GAMEFORGE_FAKE_TEXT_LATENCY = float(os.getenv("GAMEFORGE_FAKE_TEXT_LATENCY", 0.5))
+GAMEFORGE_FAKE_IMAGE_LATENCY = float(os.getenv("GAMEFORGE_FAKE_IMAGE_LATENCY", 1.0))
+# Coût de chaque image supplémentaire d'un lot, en fraction de la première (un GPU amortit le lot)
+GAMEFORGE_FAKE_IMAGE_BATCH_COST = float(os.getenv("GAMEFORGE_FAKE_IMAGE_BATCH_COST", 0.25))
+# Serveur d'inférence (manage.py inference_server, backends "server") : adresse http://hôte:port
+# ou unix:///chemin, regroupement des images (taille max des lots, attente max en ms), délai client
+GAMEFORGE_INFERENCE_URL = os.getenv("GAMEFORGE_INFERENCE_URL", "http://127.0.0.1:8765")
+GAMEFORGE_BATCH_MAX_SIZE = int(os.getenv("GAMEFORGE_BATCH_MAX_SIZE", 8))
+GAMEFORGE_BATCH_MAX_WAIT_MS = float(os.getenv("GAMEFORGE_BATCH_MAX_WAIT_MS", 50))
+GAMEFORGE_INFERENCE_TIMEOUT = float(os.getenv("GAMEFORGE_INFERENCE_TIMEOUT", 600))
@@ -3,3 +3,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gameforge.settings')
 application = get_wsgi_application()
+
+# Préchargement des backends d'inférence au démarrage du worker (HF_WARMUP=True)
+if os.getenv('HF_WARMUP', 'False').lower() in ('true', '1', 'yes'):
+    import threading
+    from games.hf_client import warmup
+    threading.Thread(target=warmup, daemon=True).start()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Game, Character, Favorite
+from .models import Game, Character, Favorite, GenerationJob, ExplorePreview, DailyQuota
 
 class CharacterInline(admin.TabularInline):
     model = Character
@@ -7,12 +7,31 @@ class CharacterInline(admin.TabularInline):
 
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'genre', 'is_public', 'created_at')
+    list_display = ('title', 'user', 'genre', 'is_public', 'star_count', 'created_at')
     list_filter = ('genre', 'is_public', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('title', 'user__username')
+    readonly_fields = ('star_count',)
     inlines = [CharacterInline]
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('user', 'game', 'created_at')
     search_fields = ('user__username', 'game__title')
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'status', 'created_at', 'updated_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('progress', 'result', 'error')
+
+@admin.register(ExplorePreview)
+class ExplorePreviewAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'created_at', 'claimed_at')
+    list_filter = ('claimed_at',)
+
+@admin.register(DailyQuota)
+class DailyQuotaAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'used')
+    list_filter = ('day',)
+    search_fields = ('user__username',)
@@ -1,64 +1,106 @@
 
 from __future__ import annotations
-import os, json, re
-from .hf_client import chat_completion, txt2img
+import hashlib, json, re, random, threading, time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+from .hf_client import chat_completion, chat_completion_json, chat_completion_stream, txt2img_batch
+from .json_output import parse_json_list, parse_json_object
 
 def _listify_keywords(keywords: str):
     return [k.strip() for k in keywords.split(",") if k.strip()]
 
-def generate_universe(genre, ambiance, keywords):
+def _universe_prompt(genre, ambiance, keywords):
     kws = ", ".join(_listify_keywords(keywords))
-    prompt = f"Crée un univers concis (5-7 lignes) pour un {genre} ambiance {ambiance}. Mots-clés: {kws}."
-    return chat_completion(prompt, max_tokens=300)
+    return f"Crée un univers concis (5-7 lignes) pour un {genre} ambiance {ambiance}. Mots-clés: {kws}."
 
-def generate_story_3_acts(title, genre, ambiance, keywords, references):
+def _story_prompt(title, genre, ambiance, keywords, references):
     refs = references or "—"
-    prompt = f"Synopsis 3 actes pour '{title}' ({genre}, {ambiance}). Réfs: {refs}. Mots-clés: {keywords}."
-    return chat_completion(prompt, max_tokens=500)
+    return f"Synopsis 3 actes pour '{title}' ({genre}, {ambiance}). Réfs: {refs}. Mots-clés: {keywords}."
 
-def generate_characters(n: int = 3):
-    """
-    Retourne toujours une LISTE de personnages proprement structurés,
-    même si la sortie HF n'est pas du JSON.
-    """
-    prompt = f"""
-    Donne {n} personnages majeurs. Réponds UNIQUEMENT par une liste JSON.
-    Chaque objet: 
+def _locations_prompt(title, genre, ambiance, keywords):
+    return f"3 lieux emblématiques du jeu '{title}' ({genre}, ambiance {ambiance}). Mots-clés: {keywords}. Format liste à puces."
+
+def generate_universe(genre, ambiance, keywords, use_cache=True):
+    return chat_completion(_universe_prompt(genre, ambiance, keywords), max_tokens=300, use_cache=use_cache)
+
+def generate_story_3_acts(title, genre, ambiance, keywords, references, use_cache=True):
+    return chat_completion(_story_prompt(title, genre, ambiance, keywords, references), max_tokens=500, use_cache=use_cache)
+
+DEFAULT_CHARACTERS = [
+    {
+        "name": "Alex",
+        "role": "Éclaireur",
+        "abilities": "Furtivité\nDrones\nParkour",
+        "motivation": "Retrouver sa sœur disparue."
+    },
+    {
+        "name": "Mira",
+        "role": "Alchimiste",
+        "abilities": "Concoctions\nContrôle de zone\nBuffs",
+        "motivation": "Rompre un ancien pacte."
+    },
+    {
+        "name": "Rook",
+        "role": "Tank",
+        "abilities": "Bouclier lourd\nProvocation\nCharge",
+        "motivation": "Protéger la cité basse."
+    },
+]
+
+def characters_schema(n: int = 3) -> dict:
+    """Schéma JSON de la réponse de generate_characters (objet racine : exigé par json_schema)."""
+    return {
+        "type": "object",
+        "properties": {
+            "characters": {
+                "type": "array", "minItems": n, "maxItems": n,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "role": {"type": "string"},
+                        "abilities": {"type": "array", "items": {"type": "string"}},
+                        "motivation": {"type": "string"},
+                    },
+                    "required": ["name", "role", "abilities", "motivation"],
+                },
+            },
+        },
+        "required": ["characters"],
+    }
+
+def _characters_prompt(title, genre, ambiance, keywords, n: int = 3) -> str:
+    return f"""
+    Donne {n} personnages majeurs du jeu '{title}' ({genre}, ambiance {ambiance}). Mots-clés: {keywords}.
+    Réponds UNIQUEMENT par un objet JSON.
+    Chaque personnage:
       - name (str)
       - role (str)
-      - abilities (list[str] ou str)
+      - abilities (list[str])
       - motivation (str, 1 phrase)
     Exemple:
-    [
+    {{"characters": [
       {{"name":"...", "role":"...", "abilities":["...","..."], "motivation":"..."}}
-    ]
+    ]}}
     """
-    raw = chat_completion(prompt, max_tokens=400) or ""
-
-    import json, re
-    data = []
-    # 1) tentative JSON direct
-    try:
-        parsed = json.loads(raw)
-        if isinstance(parsed, list):
-            data = parsed
-    except Exception:
-        pass
-
-    # 2) si échec, tenter d'extraire un bloc [ ... ] n'importe où
-    if not data:
-        m = re.search(r"\[[\s\S]*\]", raw)
-        if m:
-            try:
-                parsed = json.loads(m.group(0))
-                if isinstance(parsed, list):
-                    data = parsed
-            except Exception:
-                pass
 
-    # 3) normalisation + fallback
+def generate_characters(title, genre, ambiance, keywords, n: int = 3, use_cache=True):
+    """
+    Retourne toujours une LISTE de personnages proprement structurés.
+    Sortie contrainte par schéma côté endpoint, puis lecture tolérante (liste tronquée
+    récupérée) ; les personnages par défaut ne servent que si rien n'est lisible.
+    """
+    raw = chat_completion_json(
+        _characters_prompt(title, genre, ambiance, keywords, n), characters_schema(n), max_tokens=400, use_cache=use_cache,
+    ) or ""
+    data, _ = parse_json_list(raw, required=characters_schema(n)["properties"]["characters"]["items"]["required"])
+    return _normalize_characters(data, n) or [dict(ch) for ch in DEFAULT_CHARACTERS[:n]]
+
+def _normalize_characters(data, n: int = 3):
+    """Personnages lus du JSON -> dicts de chaînes ([] si aucun)."""
     out = []
     for ch in (data or [])[:n]:
+        if not isinstance(ch, dict):
+            continue
         abilities = ch.get("abilities", "—")
         # convertir liste -> texte à puces
         if isinstance(abilities, list):
@@ -69,51 +111,24 @@ def generate_characters(n: int = 3):
             "abilities": str(abilities or "—"),
             "motivation": str(ch.get("motivation", "—")),
         })
-
-    if not out:
-        out = [
-            {
-                "name": "Alex",
-                "role": "Éclaireur",
-                "abilities": "Furtivité\nDrones\nParkour",
-                "motivation": "Retrouver sa sœur disparue."
-            },
-            {
-                "name": "Mira",
-                "role": "Alchimiste",
-                "abilities": "Concoctions\nContrôle de zone\nBuffs",
-                "motivation": "Rompre un ancien pacte."
-            },
-            {
-                "name": "Rook",
-                "role": "Tank",
-                "abilities": "Bouclier lourd\nProvocation\nCharge",
-                "motivation": "Protéger la cité basse."
-            },
-        ][:n]
     return out
 
 
-def generate_locations(ambiance):
-    prompt = f"3 lieux emblématiques ambiance {ambiance}, format liste à puces."
-    return chat_completion(prompt, max_tokens=200)
+def generate_locations(title, genre, ambiance, keywords, use_cache=True):
+    return chat_completion(_locations_prompt(title, genre, ambiance, keywords), max_tokens=200, use_cache=use_cache)
 
-def generate_concept_image_urls(genre, ambiance, keywords, title=None, characters=None, locations=None, story=None):
-    from django.conf import settings
-    media_root = getattr(settings, "MEDIA_ROOT", os.path.join(settings.BASE_DIR,"media"))
-    os.makedirs(media_root, exist_ok=True)
-    import time
-    def save_img(prompt, prefix):
-        # Tronquer le prompt à 200 caractères pour éviter l'erreur CLIP
-        short_prompt = prompt[:200]
-        data = txt2img(short_prompt, width=768, height=512)
-        if not data: return None
-        timestamp = int(time.time() * 1000)
-        filename = f"{prefix}_{timestamp}.png"
-        path = os.path.join(media_root, filename)
-        with open(path, "wb") as f:
-            f.write(data)
-        return settings.MEDIA_URL + filename
+def stable_seed(*parts) -> int:
+    """Seed dérivé du contenu (sha256), identique d'un processus à l'autre, contrairement à hash()."""
+    digest = hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big")
+
+def generate_concept_image_urls(genre, ambiance, keywords, title=None, characters=None, locations=None, story=None, tier=None):
+    """
+    tier : palier de qualité (GAMEFORGE_IMAGE_TIERS), par défaut celui des créations.
+    Seeds dérivés du jeu (titre, genre, ambiance, mots-clés) : un même jeu garde sa composition
+    d'un palier à l'autre, et un prompt déjà rendu est lu dans le cache des rendus.
+    """
+    from .images import store_image
 
     # Prompt personnage enrichi
     char_prompt = f"Concept art d'un héros pour un jeu intitulé '{title}' ({genre}, ambiance {ambiance}). "
@@ -130,17 +145,365 @@ def generate_concept_image_urls(genre, ambiance, keywords, title=None, character
         env_prompt += f"Scénario: {story[:200]}... "
     env_prompt += f"Mots-clés: {keywords}. Style immersif et cohérent avec le jeu."
 
-    char_url = save_img(char_prompt, "char")
-    env_url = save_img(env_prompt, "env")
+    # Un seul appel batché pour les deux images.
+    # Tronquer les prompts à 200 caractères pour éviter l'erreur CLIP
+    identity = (title, genre, ambiance, keywords)
+    char_data, env_data = txt2img_batch(
+        [char_prompt[:200], env_prompt[:200]],
+        seeds=[stable_seed("char", *identity), stable_seed("env", *identity)], tier=tier,
+    )
+    char_url = store_image(char_data, "char")
+    env_url = store_image(env_data, "env")
     if not char_url or not env_url:
-        seed = abs(hash((genre, ambiance, keywords))) % 1000
+        seed = stable_seed(genre, ambiance, keywords) % 1000
         return (f"https://picsum.photos/seed/char{seed}/640/360", f"https://picsum.photos/seed/env{seed}/1280/720")
     return char_url, env_url
 
-def generate_all(title, genre, ambiance, keywords, references):
-    universe = generate_universe(genre, ambiance, keywords)
-    story = generate_story_3_acts(title, genre, ambiance, keywords, references)
-    locations = generate_locations(ambiance)
-    characters = generate_characters()
-    char_img, env_img = generate_concept_image_urls(genre, ambiance, keywords)
-    return universe, story, locations, characters, char_img, env_img
+def _notify(on_stage, stage):
+    if on_stage is not None:
+        on_stage(stage)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _get_pool(name, max_workers) -> ThreadPoolExecutor:
+    # Pools partagés par tout le processus : le plafond vaut pour toutes les générations en cours
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"gameforge-{name}")
+        return _pools[name]
+
+def _get_llm_pool() -> ThreadPoolExecutor:
+    from django.conf import settings
+    return _get_pool("llm", max(getattr(settings, "GAMEFORGE_LLM_CONCURRENCY", 4), 1))
+
+def _stage_fallback(stage):
+    if stage == "characters":
+        return [dict(ch) for ch in DEFAULT_CHARACTERS]
+    return f"[Erreur Hugging Face] Délai dépassé ({stage})"
+
+def oneshot_schema(n: int = 3) -> dict:
+    """Schéma du document unique du mode one-shot : les quatre sections d'un coup."""
+    return {
+        "type": "object",
+        "properties": {
+            "universe": {"type": "string"},
+            "story": {"type": "string"},
+            "locations": {"type": "array", "items": {"type": "string"}},
+            "characters": characters_schema(n)["properties"]["characters"],
+        },
+        "required": ["universe", "story", "locations", "characters"],
+    }
+
+def _oneshot_prompt(title, genre, ambiance, keywords, references, n: int = 3):
+    return (
+        f"Conçois le jeu '{title}' ({genre}, ambiance {ambiance}). Réfs: {references or '—'}. Mots-clés: {keywords}.\n"
+        "Réponds UNIQUEMENT par un objet JSON avec les clés :\n"
+        "- universe : univers concis (5-7 lignes) ;\n"
+        "- story : synopsis en 3 actes ;\n"
+        "- locations : 3 lieux emblématiques (liste de chaînes) ;\n"
+        f"- characters : {n} personnages majeurs (name, role, abilities (list[str]), motivation (1 phrase))."
+    )
+
+def generate_document(title, genre, ambiance, keywords, references, use_cache=True):
+    """
+    Mode one-shot : un seul appel LLM pour univers, scénario, lieux et personnages.
+    Retourne {section: valeur} pour les sections lisibles uniquement (les autres sont à générer à part).
+    """
+    raw = chat_completion_json(
+        _oneshot_prompt(title, genre, ambiance, keywords, references), oneshot_schema(),
+        max_tokens=1400, use_cache=use_cache,
+    )
+    doc, _ = parse_json_object(raw)
+    sections = {}
+    for stage in ("universe", "story"):
+        if isinstance(doc.get(stage), str) and doc[stage].strip():
+            sections[stage] = doc[stage].strip()
+    locations = doc.get("locations")
+    if isinstance(locations, list) and locations:
+        sections["locations"] = "\n".join(f"- {str(loc).lstrip('- ')}" for loc in locations)
+    elif isinstance(locations, str) and locations.strip():
+        sections["locations"] = locations.strip()
+    characters = _normalize_characters(doc.get("characters"))
+    if characters:
+        sections["characters"] = characters
+    missing = [stage for stage in ("universe", "story", "locations", "characters") if stage not in sections]
+    if missing:
+        print(f"[HF LOG] one-shot: sections manquantes {missing}, appels séparés")
+    return sections
+
+def _generation_mode():
+    from django.conf import settings
+    return getattr(settings, "GAMEFORGE_GENERATION_MODE", "parallel")
+
+def _generate_sections(title, genre, ambiance, keywords, references, on_stage=None, postprocess_story=None,
+                       use_cache=True, render_images=True, image_tier=None):
+    """
+    Lance les 4 appels LLM en parallèle (ils sont indépendants) puis les images dès que
+    personnages, lieux et scénario sont prêts, sans attendre l'univers.
+    En mode "oneshot" (GAMEFORGE_GENERATION_MODE), un document unique fournit d'abord les
+    sections ; seules celles qui y manquent sont générées par leur appel séparé.
+    postprocess_story(story, characters) est appliqué au scénario avant le rendu des images.
+    """
+    from django.conf import settings
+    cap = max(getattr(settings, "GAMEFORGE_LLM_CONCURRENCY", 4), 1)
+    stage_timeout = getattr(settings, "GAMEFORGE_LLM_STAGE_TIMEOUT", 120)
+    llm_pool = _get_llm_pool()
+
+    preset = {}
+    if _generation_mode() == "oneshot":
+        document = llm_pool.submit(generate_document, title, genre, ambiance, keywords, references, use_cache=use_cache)
+        try:
+            preset = document.result(timeout=stage_timeout)
+        except Exception as e:
+            print(f"[HF LOG] one-shot failed: {e}")
+
+    calls = {
+        "universe": (generate_universe, (genre, ambiance, keywords)),
+        "story": (generate_story_3_acts, (title, genre, ambiance, keywords, references)),
+        "locations": (generate_locations, (title, genre, ambiance, keywords)),
+        "characters": (generate_characters, (title, genre, ambiance, keywords)),
+    }
+    stages = {
+        llm_pool.submit(func, *args, use_cache=use_cache): stage
+        for stage, (func, args) in calls.items() if stage not in preset
+    }
+    # Avec moins de slots que d'étapes, certaines attendent leur tour : le délai couvre chaque « vague »
+    deadline = time.monotonic() + stage_timeout * -(-len(stages) // cap)
+    results = {}
+    images_future = None
+    pending = set(stages)
+
+    def stage_done(stage, value):
+        results[stage] = value
+        # Déclenché une seule fois, quand le second des deux (scénario, personnages) arrive
+        if postprocess_story is not None and stage in ("story", "characters") and {"story", "characters"} <= results.keys():
+            results["story"] = postprocess_story(results["story"], results["characters"])
+        _notify(on_stage, stage)
+
+    def start_images():
+        nonlocal images_future
+        if images_future is None and {"story", "locations", "characters"} <= results.keys():
+            if not render_images:
+                images_future = _get_pool("images", 1).submit(lambda: (None, None))
+            else:
+                images_future = _get_pool("images", 1).submit(
+                    generate_concept_image_urls, genre, ambiance, keywords,
+                    title=title, characters=results["characters"], locations=results["locations"], story=results["story"],
+                    tier=image_tier,
+                )
+            pending.add(images_future)
+
+    for stage, value in preset.items():
+        stage_done(stage, value)
+    start_images()
+
+    while pending:
+        llm_pending = pending - {images_future}
+        timeout = max(deadline - time.monotonic(), 0) if llm_pending else None
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            for future in llm_pending:
+                # N'annule qu'une étape encore en file : un appel déjà lancé occupe son thread
+                # jusqu'au délai du client HTTP du backend (timeout=GAMEFORGE_LLM_STAGE_TIMEOUT)
+                future.cancel()
+                print(f"[HF LOG] stage {stages[future]} timed out after {stage_timeout}s")
+                stage_done(stages[future], _stage_fallback(stages[future]))
+            pending -= llm_pending
+        for future in done:
+            if future is images_future:
+                _notify(on_stage, "images")
+                continue
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"[HF LOG] stage {stages[future]} failed: {e}")
+                value = _stage_fallback(stages[future])
+            stage_done(stages[future], value)
+        start_images()
+
+    char_img, env_img = images_future.result()
+    return results["universe"], results["story"], results["locations"], results["characters"], char_img, env_img
+
+def generate_all(title, genre, ambiance, keywords, references, on_stage=None, use_cache=True, render_images=True,
+                 image_tier=None):
+    """
+    on_stage(stage) est appelé à la fin de chaque étape (suivi de progression des jobs).
+    render_images=False saute le rendu des images (None, None), pour les mesures du texte seul.
+    """
+    return _generate_sections(
+        title, genre, ambiance, keywords, references,
+        on_stage=on_stage, postprocess_story=harmonize_names, use_cache=use_cache, render_images=render_images,
+        image_tier=image_tier,
+    )
+
+def generate_random_prompt():
+    genres = [
+        "Fantasy", "Science-Fiction", "Horreur", "Western", "Steampunk", "Mystère", "Thriller", "Aventure", "Romance", "Historique",
+        "Cyberpunk", "Space Opera", "Survival", "Noir", "Comédie", "Drame", "Uchronie", "Medieval", "Super-héros", "Magie", "Mythologie",
+        "Post-apocalyptique", "Guerre", "Enquête", "Espionnage", "Pirates", "Antiquité", "Contemporain", "Dystopie", "Fantastique", "Paranormal"
+    ]
+    ambiances = [
+        "Sombre", "Lumineux", "Étrange", "Épique", "Dystopique", "Magique", "Post-apocalyptique", "Futuriste", "Gothique", "Pastel",
+        "Organique", "Industriel", "Baroque", "Minimaliste", "Coloré", "Désertique", "Aquatique", "Montagneux", "Urbain", "Rural",
+        "Onirique", "Psychédélique", "Vintage", "Moderne", "Rustique", "Glacial", "Tropical", "Automnal", "Printanier", "Estival", "Hivernal"
+    ]
+    titles = [
+        "La Porte des Ombres", "L'Éveil des Titans", "Le Chant du Vide", "Les Larmes du Dragon", "Le Labyrinthe des Âmes", "La Cité Engloutie",
+        "Le Dernier Oracle", "Les Échos du Passé", "Le Souffle du Néant", "La Couronne de Verre", "Le Pacte des Anciens", "La Nuit des Étoiles",
+        "Le Masque du Silence", "La Prophétie Oubliée", "Le Royaume Brisé", "La Danse des Flammes", "Le Sceptre Interdit", "Les Voiles du Temps",
+        "Le Trône de Cendres", "La Légende des Sables", "Le Cri du Corbeau", "La Route des Mirages", "Le Miroir Fendu", "La Forêt des Secrets"
+    ]
+    keywords = [
+        "voyage temporel", "artefact perdu", "rébellion", "royaume déchu", "créature mythique", "intelligence artificielle", "malédiction",
+        "quête initiatique", "civilisation oubliée", "portail dimensionnel", "pouvoir interdit", "mémoire effacée", "guerre ancestrale",
+        "machine vivante", "esprit vengeur", "monde fracturé", "héritage secret", "alliance improbable", "trahison", "sacrifice", "renaissance",
+        "épidémie", "mutation", "rituel ancien", "prophétie", "chasse au trésor", "exploration spatiale", "conflit familial", "quête de rédemption"
+    ]
+    references = [
+        "Zelda", "Blade Runner", "Dark Souls", "Stranger Things", "Le Seigneur des Anneaux", "Disco Elysium", "Hollow Knight", "Dune",
+        "The Witcher", "Mass Effect", "Game of Thrones", "Star Wars", "Harry Potter", "Bioshock", "Firewatch", "Oxenfree", "Control",
+        "Final Fantasy", "Persona", "Death Stranding", "Lost", "Twin Peaks", "Naruto", "Attack on Titan", "Evangelion", "Matrix"
+    ]
+
+    genre = random.choice(genres)
+    ambiance = random.choice(ambiances)
+    title = random.choice(titles)
+    selected_keywords = ', '.join(random.sample(keywords, k=2))
+    selected_references = ', '.join(random.sample(references, k=2))
+
+    return {
+        'genre': genre,
+        'ambiance': ambiance,
+        'title': title,
+        'keywords': selected_keywords,
+        'references': selected_references
+    }
+
+# Harmonisation des noms du scénario avec les personnages générés, en une passe :
+# les lignes de titre (Acte..., **..., #...) sont gardées telles quelles, chaque autre nom
+# propre reçoit le nom de personnage suivant dans l'ordre de première apparition.
+_UPPER, _LOWER = "A-ZÀ-ÖØ-Þ", "a-zà-öø-ÿ"
+_HARMONIZE_RE = re.compile(
+    rf"^(?P<heading>[ \t]*(?:(?i:acte)|\*\*|#).*)$|\b(?P<name>[{_UPPER}][{_UPPER}{_LOWER}]{{2,}})\b",
+    re.MULTILINE,
+)
+# Mots capitalisés courants (début de phrase) qui ne sont pas des noms
+_NAME_STOPWORDS = frozenset("""
+    Acte Alors Ainsi Après Au Aux Avant Avec Cela Celui Celle Ces Cet Cette Chaque Comme Dans Depuis Des Donc Elle Elles
+    Encore Enfin Ensuite Entre Est Et Face Fin Ici Ils Jamais Les Leur Leurs Lorsque Mais Malgré Même Nous Par Parmi
+    Pendant Peu Plus Pour Pourtant Puis Quand Que Qui Quoi Sans Selon Ses Seul Seule Son Sous Sur Tandis Tous Tout Toute
+    Toutes Très Une Vers Vous Lui Partie Prologue Épilogue Introduction Conclusion Final Finale
+""".split())
+
+
+def harmonize_names(story, characters):
+    """
+    Remplace les noms propres du scénario absents des personnages par ceux-ci
+    (correspondance stable sur tout le texte : premier nom rencontré -> premier personnage...).
+    """
+    names = [ch['name'] for ch in characters if ch.get('name')]
+    if not story or not names:
+        return story
+    keep = _NAME_STOPWORDS | {part for name in names for part in name.split()}
+    mapping = {}
+
+    def substitute(match):
+        word = match.group('name')
+        if word is None or word in keep:
+            return match.group(0)
+        if word not in mapping:
+            mapping[word] = names[len(mapping) % len(names)]
+        return mapping[word]
+
+    return _HARMONIZE_RE.sub(substitute, story)
+
+def _explore_tier():
+    from django.conf import settings
+    return settings.GAMEFORGE_EXPLORE_IMAGE_TIER
+
+def generate_random_game(on_stage=None, use_cache=True):
+    """
+    Pipeline de l'exploration libre : prompt aléatoire -> aperçu complet (dict sérialisable).
+    use_cache=False pour une régénération explicite (le cache LLM renverrait le même texte).
+    Images au palier de l'exploration (rapide), améliorables une fois le jeu enregistré.
+    """
+    tier = _explore_tier()
+    prompt = generate_random_prompt()
+    genre = prompt['genre']
+    ambiance = prompt['ambiance']
+    title = prompt['title']
+    keywords = prompt['keywords']
+    references = prompt['references']
+
+    universe, story, locations, chars, char_img, env_img = _generate_sections(
+        title, genre, ambiance, keywords, references,
+        on_stage=on_stage, postprocess_story=harmonize_names, use_cache=use_cache, image_tier=tier,
+    )
+
+    return {
+        'title': title, 'genre': genre, 'ambiance': ambiance, 'keywords': keywords, 'references': references,
+        'universe': universe, 'story': story, 'locations': locations, 'characters': chars,
+        'character_image_url': char_img, 'environment_image_url': env_img, 'image_tier': tier,
+    }
+
+
+def stream_random_game(emit, use_cache=True):
+    """
+    Variante streamée de generate_random_game pour la page d'exploration (SSE).
+    emit(event, data) reçoit :
+      - ("token", {"section", "text"}) pour chaque morceau d'univers, de scénario ou de lieux ;
+      - ("section", {"section", "value"}) quand une section est définitive ;
+      - ("images", {"character_image_url", "environment_image_url"}).
+    Les sections sont générées en parallèle ; retourne l'aperçu complet. Chaque étape est bornée
+    comme dans _generate_sections : au-delà, TimeoutError (événement "error" côté vue).
+    """
+    from django.conf import settings
+    prompt = generate_random_prompt()
+    genre, ambiance, title = prompt['genre'], prompt['ambiance'], prompt['title']
+    keywords, references = prompt['keywords'], prompt['references']
+    emit("section", {"section": "meta", "value": prompt})
+
+    def stream_section(section, text_prompt, max_tokens):
+        parts = []
+        for token in chat_completion_stream(text_prompt, max_tokens=max_tokens, use_cache=use_cache):
+            parts.append(token)
+            emit("token", {"section": section, "text": token})
+        return "".join(parts).strip()
+
+    pool = _get_llm_pool()
+    universe_f = pool.submit(stream_section, "universe", _universe_prompt(genre, ambiance, keywords), 300)
+    story_f = pool.submit(stream_section, "story", _story_prompt(title, genre, ambiance, keywords, references), 500)
+    locations_f = pool.submit(stream_section, "locations", _locations_prompt(title, genre, ambiance, keywords), 200)
+    chars_f = pool.submit(generate_characters, title, genre, ambiance, keywords, use_cache=use_cache)
+    futures = {"universe": universe_f, "story": story_f, "locations": locations_f, "characters": chars_f}
+    cap = max(getattr(settings, "GAMEFORGE_LLM_CONCURRENCY", 4), 1)
+    stage_timeout = getattr(settings, "GAMEFORGE_LLM_STAGE_TIMEOUT", 120)
+    deadline = time.monotonic() + stage_timeout * -(-len(futures) // cap)
+
+    def result(stage):
+        try:
+            return futures[stage].result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            for future in futures.values():
+                future.cancel()
+            print(f"[HF LOG] stream stage {stage} timed out after {stage_timeout}s")
+            raise TimeoutError(f"Délai dépassé ({stage})") from None
+
+    chars = result("characters")
+    emit("section", {"section": "characters", "value": chars})
+    story = harmonize_names(result("story"), chars)
+    emit("section", {"section": "story", "value": story})
+    locations = result("locations")
+    tier = _explore_tier()
+    char_img, env_img = generate_concept_image_urls(
+        genre, ambiance, keywords, title=title, characters=chars, locations=locations, story=story, tier=tier,
+    )
+    emit("images", {"character_image_url": char_img, "environment_image_url": env_img})
+    universe = result("universe")
+
+    return {
+        'title': title, 'genre': genre, 'ambiance': ambiance, 'keywords': keywords, 'references': references,
+        'universe': universe, 'story': story, 'locations': locations, 'characters': chars,
+        'character_image_url': char_img, 'environment_image_url': env_img, 'image_tier': tier,
+    }
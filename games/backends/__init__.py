@@ -0,0 +1,80 @@
+"""
+Backends d'inférence, choisis dans les settings (GAMEFORGE_TEXT_BACKEND, GAMEFORGE_IMAGE_BACKEND).
+
+hf_client garde le cache, les logs et le suivi des tokens ; un backend ne fait que l'appel au
+modèle. Les modules des backends (torch, transformers, diffusers...) ne sont importés qu'à
+la première utilisation, et chaque backend reste chargé pour la durée du processus.
+"""
+from __future__ import annotations
+import threading
+from typing import Iterator, List, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+TEXT_BACKENDS = {
+    "remote": "games.backends.remote.RemoteTextBackend",
+    "local": "games.backends.local.LocalTextBackend",
+    "fake": "games.backends.fake.FakeTextBackend",
+    "server": "games.backends.server.ServerTextBackend",
+}
+IMAGE_BACKENDS = {
+    "diffusers": "games.backends.diffusion.DiffusionImageBackend",
+    "remote": "games.backends.remote.RemoteImageBackend",
+    "fake": "games.backends.fake.FakeImageBackend",
+    "server": "games.backends.server.ServerImageBackend",
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class TextBackend:
+    # Identifiant du modèle, utilisé dans la clé du cache LLM
+    model = ""
+    # Accepte response_format (sortie JSON contrainte par schéma)
+    structured_output = False
+
+    def complete(self, messages: List[dict], max_tokens: int, temperature: float, response_format: dict = None) -> Tuple[str, object]:
+        """Retourne (texte, usage) ; usage expose prompt_tokens / completion_tokens, ou None."""
+        raise NotImplementedError
+
+    def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> Iterator[str]:
+        raise NotImplementedError
+
+    def warmup(self) -> None:
+        pass
+
+
+class ImageBackend:
+    def txt2img_batch(self, prompts: List[str], seeds: List[int | None], width: int, height: int,
+                      steps: int | None = None, model_id: str | None = None, options: dict | None = None) -> List[bytes]:
+        """
+        Un PNG par prompt, b"" pour chaque échec. options : réglages du palier de qualité
+        (scheduler, slicing...), appliqués par les backends qui les supportent.
+        """
+        raise NotImplementedError
+
+    def warmup(self, model_ids: List[str] | None = None) -> None:
+        pass
+
+
+def _get_backend(kind, registry, name):
+    if name not in registry:
+        raise ImproperlyConfigured(f"Backend {kind} inconnu : {name!r} (choix : {', '.join(registry)})")
+    with _backends_lock:
+        backend = _backends.get((kind, name))
+        if backend is None:
+            backend = _backends[(kind, name)] = import_string(registry[name])()
+        return backend
+
+
+def get_text_backend(name: str | None = None) -> TextBackend:
+    """Backend texte `name`, par défaut celui des settings."""
+    from django.conf import settings
+    return _get_backend("texte", TEXT_BACKENDS, name or getattr(settings, "GAMEFORGE_TEXT_BACKEND", "remote"))
+
+
+def get_image_backend(name: str | None = None) -> ImageBackend:
+    from django.conf import settings
+    return _get_backend("images", IMAGE_BACKENDS, name or getattr(settings, "GAMEFORGE_IMAGE_BACKEND", "diffusers"))
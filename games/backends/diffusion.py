@@ -0,0 +1,240 @@
+"""
+Rendu local des images avec diffusers : registre des pipelines chargés (LRU sous un budget
+mémoire) et génération par lots. Module lourd (torch, diffusers) : importé à la demande
+par le registre (GAMEFORGE_IMAGE_BACKEND=diffusers), seulement dans les processus qui génèrent.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import List
+
+import diffusers
+import torch
+from diffusers import DiffusionPipeline
+from django.conf import settings
+
+from . import ImageBackend
+
+# Registre des pipelines diffusers : (model_id, dtype, device) -> _PipelineEntry, ordre LRU
+_pipelines: "OrderedDict[tuple, _PipelineEntry]" = OrderedDict()
+_pipelines_lock = threading.Lock()
+_loading_locks: dict = {}
+
+# Schedulers des paliers de qualité : nom -> (classe diffusers, paramètres de from_config)
+SCHEDULERS = {
+    "dpmpp": ("DPMSolverMultistepScheduler", {"algorithm_type": "dpmsolver++", "use_karras_sigmas": True}),
+    "euler_a": ("EulerAncestralDiscreteScheduler", {}),
+    # Quelques étapes seulement, avec un modèle distillé LCM (ou ses poids LoRA)
+    "lcm": ("LCMScheduler", {}),
+}
+
+
+class _PipelineEntry:
+    """Pipeline chargé + verrou d'inférence (un pipeline diffusers n'est pas réentrant)."""
+
+    def __init__(self, pipe, size_bytes: int):
+        self.pipe = pipe
+        self.size_bytes = size_bytes
+        self.lock = threading.Lock()
+        self.default_scheduler = pipe.scheduler
+        self.schedulers = {}
+        self.channels_last = False
+        self.compiled = False
+        # Embeddings CLIP des prompts déjà rendus : prompt -> (positif, négatif), ordre LRU
+        self.prompt_embeds: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def encode(self, prompts: List[str]):
+        """
+        (prompt_embeds, negative_prompt_embeds) du lot, encodeur de texte appelé seulement pour
+        les prompts absents du cache. None si désactivé ou si le pipeline a plusieurs encodeurs
+        (SDXL...) : les prompts sont alors passés tels quels. Appelé sous self.lock.
+        """
+        limit = settings.GAMEFORGE_PROMPT_EMBED_CACHE
+        encode_prompt = getattr(self.pipe, "encode_prompt", None)
+        if limit <= 0 or encode_prompt is None:
+            return None
+        positives, negatives = [], []
+        for prompt in prompts:
+            embeds = self.prompt_embeds.get(prompt)
+            if embeds is None:
+                with torch.no_grad():
+                    embeds = encode_prompt(prompt, self.pipe.device, 1, True)
+                if not isinstance(embeds, tuple) or len(embeds) != 2:
+                    return None
+                self.prompt_embeds[prompt] = embeds
+                while len(self.prompt_embeds) > limit:
+                    self.prompt_embeds.popitem(last=False)
+            else:
+                self.prompt_embeds.move_to_end(prompt)
+            positives.append(embeds[0])
+            negatives.append(embeds[1])
+        return torch.cat(positives), torch.cat(negatives)
+
+    def configure(self, options: dict) -> None:
+        """Applique les réglages d'un palier au pipeline partagé (appelé sous self.lock)."""
+        pipe = self.pipe
+        name = options.get("scheduler") or "default"
+        if name == "default":
+            pipe.scheduler = self.default_scheduler
+        else:
+            if name not in self.schedulers:
+                cls_name, kwargs = SCHEDULERS[name]
+                self.schedulers[name] = getattr(diffusers, cls_name).from_config(self.default_scheduler.config, **kwargs)
+            pipe.scheduler = self.schedulers[name]
+        if hasattr(pipe, "enable_attention_slicing"):
+            if options.get("attention_slicing"):
+                pipe.enable_attention_slicing()
+            else:
+                pipe.disable_attention_slicing()
+        vae = getattr(pipe, "vae", None)
+        if vae is not None and hasattr(vae, "enable_slicing"):
+            # Décodage image par image : pic mémoire réduit sur les lots
+            if options.get("vae_slicing"):
+                vae.enable_slicing()
+            else:
+                vae.disable_slicing()
+        unet = getattr(pipe, "unet", None)
+        # channels_last et compile modifient le UNet partagé : appliqués une fois, gardés ensuite
+        if unet is not None and options.get("channels_last") and not self.channels_last:
+            unet.to(memory_format=torch.channels_last)
+            self.channels_last = True
+        if unet is not None and options.get("compile") and not self.compiled:
+            print("[HF LOG] torch.compile du UNet (première image lente)")
+            pipe.unet = torch.compile(unet)
+            self.compiled = True
+
+
+def _default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _default_dtype(device: str):
+    return torch.float16 if device == "cuda" else torch.float32
+
+
+def _pipeline_size(pipe) -> int:
+    size = 0
+    for component in getattr(pipe, "components", {}).values():
+        if isinstance(component, torch.nn.Module):
+            size += sum(p.numel() * p.element_size() for p in component.parameters())
+    return size
+
+
+def _evict_for(size_bytes: int) -> None:
+    # Appelé sous _pipelines_lock
+    budget = settings.HF_PIPELINE_MEMORY_MB * 1024 * 1024
+    used = sum(e.size_bytes for e in _pipelines.values())
+    while _pipelines and used + size_bytes > budget:
+        key, entry = _pipelines.popitem(last=False)
+        used -= entry.size_bytes
+        print(f"[HF LOG] Pipeline evicted: {key} ({entry.size_bytes // (1024 * 1024)} Mo)")
+        del entry
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+def get_pipeline(model_id: str | None = None, dtype=None, device: str | None = None) -> _PipelineEntry:
+    """
+    Retourne le pipeline partagé pour (model_id, dtype, device), chargé une seule fois
+    par processus. Les requêtes concurrentes sur la même clé attendent le même chargement.
+    """
+    model_id = model_id or settings.HF_IMAGE_MODEL
+    device = device or _default_device()
+    dtype = dtype or _default_dtype(device)
+    key = (model_id, str(dtype), device)
+
+    with _pipelines_lock:
+        entry = _pipelines.get(key)
+        if entry is not None:
+            _pipelines.move_to_end(key)
+            return entry
+        loading_lock = _loading_locks.setdefault(key, threading.Lock())
+
+    with loading_lock:
+        with _pipelines_lock:
+            entry = _pipelines.get(key)
+            if entry is not None:
+                _pipelines.move_to_end(key)
+                return entry
+        print(f"[HF LOG] Loading pipeline {model_id} ({dtype}) on {device}")
+        pipe = DiffusionPipeline.from_pretrained(model_id, torch_dtype=dtype).to(device)
+        entry = _PipelineEntry(pipe, _pipeline_size(pipe))
+        with _pipelines_lock:
+            _evict_for(entry.size_bytes)
+            _pipelines[key] = entry
+        return entry
+
+
+def warmup_pipelines(model_ids: List[str] | None = None) -> None:
+    """Précharge les pipelines configurés (à appeler au démarrage d'un worker)."""
+    for model_id in model_ids or settings.HF_IMAGE_MODELS:
+        try:
+            get_pipeline(model_id)
+        except Exception as e:
+            print(f"[HF LOG] Warm-up failed for {model_id}: {e}")
+
+
+def _png_bytes(image) -> bytes:
+    import io
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def txt2img_batch(
+    prompts: List[str],
+    seeds: List[int | None] | None = None,
+    width: int = 768,
+    height: int = 512,
+    steps: int | None = None,
+    model_id: str | None = None,
+    options: dict | None = None,
+) -> List[bytes]:
+    """
+    Génère plusieurs images en un seul appel du pipeline (UNet et VAE passent sur tout le lot).
+    Un seed par prompt, appliqué par un torch.Generator par image (None = aléatoire) : même seed,
+    même rendu. options : réglages du palier (cf. _PipelineEntry.configure).
+    Retourne une liste de PNG, b"" pour chaque échec.
+    """
+    if not prompts:
+        return []
+    seeds = list(seeds or [None] * len(prompts))
+    try:
+        entry = get_pipeline(model_id)
+        device = entry.pipe.device
+        print(f"[HF LOG] Diffusers device used: {device}")
+        generators = []
+        for seed in seeds:
+            g = torch.Generator(device=device)
+            if seed is None:
+                g.seed()
+            else:
+                g.manual_seed(int(seed))
+            generators.append(g)
+        kwargs = {"height": height, "width": width, "generator": generators}
+        if steps:
+            kwargs["num_inference_steps"] = steps
+        with entry.lock:
+            entry.configure(options or {})
+            embeds = entry.encode(list(prompts))
+            if embeds is None:
+                images = entry.pipe(list(prompts), **kwargs).images
+            else:
+                images = entry.pipe(prompt_embeds=embeds[0], negative_prompt_embeds=embeds[1], **kwargs).images
+        print(f"[HF LOG] txt2img_batch generated {len(images)} images successfully.")
+        return [_png_bytes(image) for image in images]
+    except Exception as e:
+        import traceback
+        print(f"[HF LOG] txt2img_batch error: {e}")
+        traceback.print_exc()
+        return [b""] * len(prompts)
+
+
+class DiffusionImageBackend(ImageBackend):
+    """Rendu local : pipelines partagés par tout le processus (registre ci-dessus)."""
+
+    def txt2img_batch(self, prompts, seeds, width, height, steps=None, model_id=None, options=None):
+        return txt2img_batch(prompts, seeds=seeds, width=width, height=height, steps=steps, model_id=model_id, options=options)
+
+    def warmup(self, model_ids=None):
+        warmup_pipelines(model_ids)
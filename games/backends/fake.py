@@ -0,0 +1,109 @@
+"""
+Backend factice et déterministe, pour tester et mesurer le tier web hors ligne.
+
+Le texte est choisi d'après le hash du prompt ; avec un response_format, la réponse est un JSON
+conforme au schéma. Les images sont des PNG dessinés avec Pillow d'après (prompt, seed).
+La latence simulée (GAMEFORGE_FAKE_*_LATENCY, GAMEFORGE_FAKE_IMAGE_BATCH_COST) imite un vrai modèle.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Iterator
+
+from django.conf import settings
+
+from . import ImageBackend, TextBackend
+
+PHRASES = [
+    "Sous un ciel de cendres, les dernières cités flottantes se disputent les routes du vent.",
+    "Acte 1 : un héritier sans nom découvre la carte d'un royaume englouti.",
+    "Acte 2 : l'alliance se brise quand le traître révèle la véritable nature de la relique.",
+    "Acte 3 : la tempête finale oblige chacun à choisir entre sa quête et les siens.",
+    "- La Forge Écarlate : une cathédrale d'acier où les golems prient encore.",
+    "- Le Marais des Échos : chaque pas y répète une voix du passé.",
+    "- La Tour d'Ambre : bibliothèque verticale gardée par des automates.",
+    "Les factions négocient une trêve fragile tandis que la magie s'éteint lentement.",
+]
+NAMES = ["Kael", "Lyra", "Orin", "Sélène", "Darius", "Nyx"]
+ROLES = ["Éclaireuse", "Mage", "Tank", "Alchimiste", "Voleur", "Archiviste"]
+
+
+def _rng(*parts) -> random.Random:
+    digest = hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _schema_of(response_format):
+    if not response_format:
+        return None
+    if response_format.get("type") == "json_schema":
+        return response_format["json_schema"]["schema"]
+    return response_format.get("value")
+
+
+def _instance(schema, rng, key=""):
+    """Valeur conforme au sous-ensemble de JSON Schema utilisé par ai.py."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _instance(sub, rng, name) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = schema.get("minItems", 3)
+        return [_instance(schema.get("items", {"type": "string"}), rng, key) for _ in range(count)]
+    if key == "name":
+        return rng.choice(NAMES)
+    if key == "role":
+        return rng.choice(ROLES)
+    return rng.choice(PHRASES)
+
+
+class FakeTextBackend(TextBackend):
+    model = "fake"
+    structured_output = True
+
+    def _text(self, messages, max_tokens, response_format):
+        rng = _rng(messages, max_tokens)
+        schema = _schema_of(response_format)
+        if schema is not None:
+            return json.dumps(_instance(schema, rng), ensure_ascii=False)
+        return "\n".join(rng.sample(PHRASES, 4))
+
+    def complete(self, messages, max_tokens, temperature, response_format=None):
+        time.sleep(settings.GAMEFORGE_FAKE_TEXT_LATENCY)
+        text = self._text(messages, max_tokens, response_format)
+        # Un mot = un token : ordres de grandeur pour hf_client.usage_stats()
+        prompt_words = sum(len(m["content"].split()) for m in messages)
+        return text, SimpleNamespace(prompt_tokens=prompt_words, completion_tokens=len(text.split()))
+
+    def stream(self, messages, max_tokens, temperature) -> Iterator[str]:
+        # Même latence totale qu'un appel complet, répartie sur les mots
+        words = self._text(messages, max_tokens, None).split(" ")
+        delay = settings.GAMEFORGE_FAKE_TEXT_LATENCY / len(words)
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            yield word if i == 0 else " " + word
+
+
+class FakeImageBackend(ImageBackend):
+    def _png(self, prompt, seed, width, height) -> bytes:
+        from PIL import Image, ImageDraw
+
+        rng = _rng(prompt, seed, width, height)
+        image = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x0, y0 = rng.randrange(width), rng.randrange(height)
+            x1, y1 = x0 + rng.randrange(width // 2) + 1, y0 + rng.randrange(height // 2) + 1
+            draw.ellipse((x0, y0, x1, y1), fill=tuple(rng.randrange(256) for _ in range(3)))
+        buf = io.BytesIO()
+        image.save(buf, format="PNG")
+        return buf.getvalue()
+
+    def txt2img_batch(self, prompts, seeds, width, height, steps=None, model_id=None, options=None):
+        # Lot : la première image coûte la latence entière, les suivantes une fraction
+        extra = settings.GAMEFORGE_FAKE_IMAGE_BATCH_COST * (len(prompts) - 1)
+        time.sleep(settings.GAMEFORGE_FAKE_IMAGE_LATENCY * (1 + extra))
+        return [self._png(prompt, seed, width, height) for prompt, seed in zip(prompts, seeds)]
@@ -0,0 +1,85 @@
+"""
+Texte généré dans le processus avec transformers (CPU), sans aller-retour réseau.
+
+Le modèle (HF_LOCAL_TEXT_MODEL) est chargé une fois puis gardé en mémoire. HF_LOCAL_QUANTIZATION :
+"int8" quantifie dynamiquement les couches Linear (torch.ao, CPU), "bf16" charge les poids
+en bfloat16, "none" en float32. Une génération à la fois : les threads torch occupent déjà
+tous les cœurs.
+"""
+from __future__ import annotations
+import threading
+from types import SimpleNamespace
+from typing import Iterator
+
+import torch
+from django.conf import settings
+from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
+
+from . import TextBackend
+
+
+class LocalTextBackend(TextBackend):
+    def __init__(self):
+        self.model_id = settings.HF_LOCAL_TEXT_MODEL
+        self.quantization = settings.HF_LOCAL_QUANTIZATION
+        self.model = f"local:{self.model_id}:{self.quantization}"
+        self._tokenizer = None
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._generate_lock = threading.Lock()
+
+    def warmup(self) -> None:
+        self._get_model()
+
+    def _get_model(self):
+        with self._load_lock:
+            if self._model is None:
+                print(f"[HF LOG] Loading local text model {self.model_id} ({self.quantization})")
+                dtype = torch.bfloat16 if self.quantization == "bf16" else torch.float32
+                tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+                model = AutoModelForCausalLM.from_pretrained(self.model_id, torch_dtype=dtype)
+                if self.quantization == "int8":
+                    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                model.eval()
+                self._tokenizer, self._model = tokenizer, model
+            return self._tokenizer, self._model
+
+    def _inputs(self, tokenizer, messages):
+        return tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")
+
+    def _generate_kwargs(self, tokenizer, input_ids, max_tokens, temperature):
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "max_new_tokens": max_tokens,
+            "do_sample": temperature > 0,
+            "temperature": temperature,
+            "pad_token_id": tokenizer.pad_token_id or tokenizer.eos_token_id,
+        }
+
+    def complete(self, messages, max_tokens, temperature, response_format=None):
+        # response_format ignoré (structured_output = False) : la consigne JSON reste dans le prompt
+        tokenizer, model = self._get_model()
+        input_ids = self._inputs(tokenizer, messages)
+        with self._generate_lock, torch.inference_mode():
+            output = model.generate(**self._generate_kwargs(tokenizer, input_ids, max_tokens, temperature))
+        new_tokens = output[0, input_ids.shape[1]:]
+        usage = SimpleNamespace(prompt_tokens=input_ids.shape[1], completion_tokens=len(new_tokens))
+        return tokenizer.decode(new_tokens, skip_special_tokens=True), usage
+
+    def stream(self, messages, max_tokens, temperature) -> Iterator[str]:
+        tokenizer, model = self._get_model()
+        input_ids = self._inputs(tokenizer, messages)
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        kwargs = dict(self._generate_kwargs(tokenizer, input_ids, max_tokens, temperature), streamer=streamer)
+
+        def run():
+            with self._generate_lock, torch.inference_mode():
+                model.generate(**kwargs)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        for token in streamer:
+            if token:
+                yield token
+        thread.join()
@@ -0,0 +1,78 @@
+"""Endpoint Hugging Face distant (InferenceClient) : texte et images."""
+from __future__ import annotations
+import io
+from typing import Iterator, List
+
+from django.conf import settings
+
+from . import ImageBackend, TextBackend
+
+
+class RemoteTextBackend(TextBackend):
+    structured_output = True
+
+    def __init__(self):
+        self.model = settings.HF_TEXT_MODEL
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from huggingface_hub import InferenceClient
+            # Délai HTTP = délai d'une étape : un appel bloqué libère son thread du pool LLM
+            self._client = InferenceClient(model=self.model, token=settings.HF_TOKEN, timeout=settings.GAMEFORGE_LLM_STAGE_TIMEOUT)
+        return self._client
+
+    def complete(self, messages, max_tokens, temperature, response_format=None):
+        extra = {"response_format": response_format} if response_format else {}
+        resp = self._get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **extra,
+        )
+        return resp.choices[0].message.content, getattr(resp, "usage", None)
+
+    def stream(self, messages, max_tokens, temperature) -> Iterator[str]:
+        stream = self._get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+
+class RemoteImageBackend(ImageBackend):
+    """Une requête text_to_image par prompt (l'API n'a pas de lot) ; options ignorées (côté endpoint)."""
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from huggingface_hub import InferenceClient
+            self._client = InferenceClient(token=settings.HF_TOKEN, timeout=settings.GAMEFORGE_LLM_STAGE_TIMEOUT)
+        return self._client
+
+    def txt2img_batch(self, prompts, seeds, width, height, steps=None, model_id=None, options=None) -> List[bytes]:
+        out = []
+        for prompt, seed in zip(prompts, seeds):
+            try:
+                image = self._get_client().text_to_image(
+                    prompt, model=model_id or settings.HF_IMAGE_MODEL,
+                    width=width, height=height, num_inference_steps=steps, seed=seed,
+                )
+                buf = io.BytesIO()
+                image.save(buf, format="PNG")
+                out.append(buf.getvalue())
+            except Exception as e:
+                print(f"[HF LOG] text_to_image error: {e}")
+                out.append(b"")
+        return out
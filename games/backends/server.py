@@ -0,0 +1,133 @@
+"""
+Client du serveur d'inférence local (manage.py inference_server) : le serveur garde les modèles
+chargés et regroupe les rendus d'images concurrents en lots. GAMEFORGE_INFERENCE_URL :
+http://hôte:port ou unix:///chemin/vers/socket.
+"""
+from __future__ import annotations
+import base64
+import http.client
+import json
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from . import ImageBackend, TextBackend
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def parse_address(url):
+    """("unix", chemin) ou ("tcp", (hôte, port)) d'après GAMEFORGE_INFERENCE_URL."""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return "unix", parsed.path
+    return "tcp", (parsed.hostname or "127.0.0.1", parsed.port or 8765)
+
+
+def _connection(timeout=None):
+    kind, address = parse_address(settings.GAMEFORGE_INFERENCE_URL)
+    timeout = timeout or settings.GAMEFORGE_INFERENCE_TIMEOUT
+    if kind == "unix":
+        return UnixHTTPConnection(address, timeout=timeout)
+    return http.client.HTTPConnection(*address, timeout=timeout)
+
+
+def _open(method, path, payload=None, timeout=None):
+    conn = _connection(timeout)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    if resp.status != 200:
+        detail = resp.read().decode("utf-8", "replace")
+        conn.close()
+        raise RuntimeError(f"serveur d'inférence : HTTP {resp.status} {detail}")
+    return conn, resp
+
+
+def call(method, path, payload=None, timeout=None):
+    conn, resp = _open(method, path, payload, timeout)
+    try:
+        return json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+class ServerTextBackend(TextBackend):
+    """
+    Modèle et capacités lus sur le serveur (/v1/info), relus au plus toutes les INFO_TTL secondes :
+    la clé du cache LLM suit le modèle réellement servi, pas l'adresse du serveur.
+    """
+    INFO_TTL = 60
+
+    def __init__(self):
+        self._info = None
+        self._info_at = 0.0
+        self._info_lock = threading.Lock()
+
+    def _get_info(self):
+        with self._info_lock:
+            if self._info is None or time.monotonic() - self._info_at > self.INFO_TTL:
+                try:
+                    self._info = call("GET", "/v1/info", timeout=settings.GAMEFORGE_LLM_STAGE_TIMEOUT)
+                    self._info_at = time.monotonic()
+                except Exception as e:
+                    print(f"[HF LOG] inference server info unavailable: {e}")
+                    if self._info is None:
+                        # Serveur injoignable : pas de sortie contrainte supposée, rien de mémorisé
+                        return {"text_model": f"server:{settings.GAMEFORGE_INFERENCE_URL}", "structured_output": False}
+            return self._info
+
+    @property
+    def model(self):
+        return self._get_info()["text_model"]
+
+    @property
+    def structured_output(self):
+        # Faux si le backend du serveur ignore response_format (ex. local)
+        return self._get_info()["structured_output"]
+
+    def warmup(self):
+        self._get_info()
+
+    def complete(self, messages, max_tokens, temperature, response_format=None):
+        data = call("POST", "/v1/chat", {
+            "messages": messages, "max_tokens": max_tokens, "temperature": temperature,
+            "response_format": response_format,
+        }, timeout=settings.GAMEFORGE_LLM_STAGE_TIMEOUT)
+        usage = SimpleNamespace(**data["usage"]) if data.get("usage") else None
+        return data["text"], usage
+
+    def stream(self, messages, max_tokens, temperature) -> Iterator[str]:
+        # Réponse en JSON lines : {"token": ...} par ligne
+        conn, resp = _open("POST", "/v1/chat/stream", {
+            "messages": messages, "max_tokens": max_tokens, "temperature": temperature,
+        }, timeout=settings.GAMEFORGE_LLM_STAGE_TIMEOUT)
+        try:
+            for line in resp:
+                if line.strip():
+                    yield json.loads(line)["token"]
+        finally:
+            conn.close()
+
+
+class ServerImageBackend(ImageBackend):
+    def txt2img_batch(self, prompts, seeds, width, height, steps=None, model_id=None, options=None):
+        data = call("POST", "/v1/images", {
+            "prompts": list(prompts), "seeds": list(seeds), "width": width, "height": height,
+            "steps": steps, "model_id": model_id, "options": options,
+        })
+        return [base64.b64decode(image) for image in data["images"]]
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import quota
+
+
+def quota_usage(request):
+    """`quota` dans les templates ; évalué seulement si un template l'affiche, lu dans le cache (cf. quota)."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {"quota": SimpleLazyObject(lambda: quota.usage(user))}
@@ -0,0 +1,74 @@
+"""
+Stock d'aperçus d'exploration pré-générés.
+
+Le worker complète le stock jusqu'à GAMEFORGE_EXPLORE_POOL_TARGET pendant ses temps morts
+(ou `manage.py explore_pool --prefill` avant un pic) ; explore_view consomme un aperçu
+par UPDATE conditionnel, sans attendre le LLM ni la diffusion.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ExplorePreview
+
+# Les aperçus consommés sont gardés un temps pour mesurer le débit, puis purgés
+CLAIMED_RETENTION = timedelta(days=1)
+
+
+def _target():
+    return getattr(settings, "GAMEFORGE_EXPLORE_POOL_TARGET", 5)
+
+
+def _stock():
+    return ExplorePreview.objects.filter(claimed_at__isnull=True)
+
+
+def pop():
+    """Retire atomiquement l'aperçu le plus ancien du stock ; None si le stock est vide."""
+    while True:
+        item = _stock().order_by('created_at').first()
+        if item is None:
+            return None
+        claimed = ExplorePreview.objects.filter(pk=item.pk, claimed_at__isnull=True).update(claimed_at=timezone.now())
+        if claimed:
+            return item.payload
+
+
+def depth():
+    return _stock().count()
+
+
+def needs_refill():
+    return depth() < _target()
+
+
+def refill_one(use_cache=True):
+    from .ai import generate_random_game
+    return ExplorePreview.objects.create(payload=generate_random_game(use_cache=use_cache))
+
+
+def refill(target=None, use_cache=True, on_item=None):
+    """Génère des aperçus jusqu'à atteindre target (par défaut la cible configurée)."""
+    target = _target() if target is None else target
+    added = 0
+    while depth() < target:
+        item = refill_one(use_cache=use_cache)
+        added += 1
+        if on_item is not None:
+            on_item(item)
+    ExplorePreview.objects.filter(claimed_at__lt=timezone.now() - CLAIMED_RETENTION).delete()
+    return added
+
+
+def metrics():
+    now = timezone.now()
+    last_hour = now - timedelta(hours=1)
+    oldest = _stock().order_by('created_at').values_list('created_at', flat=True).first()
+    return {
+        "depth": depth(),
+        "target": _target(),
+        "refilled_last_hour": ExplorePreview.objects.filter(created_at__gte=last_hour).count(),
+        "served_last_hour": ExplorePreview.objects.filter(claimed_at__gte=last_hour).count(),
+        "oldest_age_seconds": (now - oldest).total_seconds() if oldest else None,
+    }
@@ -1,32 +1,18 @@
-
+"""
+Appels aux modèles : cache des réponses, logs [HF LOG], suivi des tokens et sortie JSON contrainte.
+L'inférence elle-même est déléguée au backend choisi dans les settings (games/backends).
+"""
 from __future__ import annotations
 import os
-from typing import List, Tuple
-from huggingface_hub import InferenceClient
-import dotenv 
-from diffusers import DiffusionPipeline
-import torch
-
-dotenv.load_dotenv()
-
-HF_TOKEN = os.getenv("HF_TOKEN", None)
-HF_TEXT_MODEL = os.getenv("HF_TEXT_MODEL", "HuggingFaceH4/zephyr-7b-beta")
-HF_IMAGE_MODEL = os.getenv("HF_IMAGE_MODEL", "runwayml/stable-diffusion-v1-5")
-
-_text_client = None
-_image_client = None
+import re
+import threading
+from typing import Iterator, List
+from .backends import get_image_backend, get_text_backend
+from .llm_cache import get_cache, make_key
 
-def _get_text_client() -> InferenceClient:
-    global _text_client
-    if _text_client is None:
-        _text_client = InferenceClient(model=HF_TEXT_MODEL, token=HF_TOKEN)
-    return _text_client
-
-def _get_image_client() -> InferenceClient:
-    global _image_client
-    if _image_client is None:
-        _image_client = InferenceClient(model=HF_IMAGE_MODEL, token=HF_TOKEN)
-    return _image_client
+# Tokens consommés par les appels chat_completion (hors cache), d'après le champ usage des réponses
+_usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_usage_lock = threading.Lock()
 
 SYSTEM_INSTRUCTION = (
     "Vous êtes GameForge, un assistant expert en création de jeux vidéo. "
@@ -37,47 +23,206 @@ SYSTEM_INSTRUCTION = (
     "Formattez vos réponses pour faciliter leur intégration dans une interface web."
 )
 
-def chat_completion(prompt: str, max_tokens: int = 2000) -> str:
-    client = _get_text_client()
+def _record_usage(usage) -> None:
+    with _usage_lock:
+        _usage["calls"] += 1
+        if usage is not None:
+            _usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            _usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+def usage_stats() -> dict:
+    """Appels et tokens cumulés depuis le démarrage du processus."""
+    with _usage_lock:
+        return dict(_usage, total_tokens=_usage["prompt_tokens"] + _usage["completion_tokens"])
+
+# Sortie JSON contrainte par schéma : "json_schema" (format OpenAI, TGI récent et fournisseurs HF),
+# "grammar" (grammaire TGI {"type": "json", "value": schéma}) ou "off" (consigne dans le prompt seulement)
+HF_JSON_MODE = os.getenv("HF_JSON_MODE", "json_schema").lower()
+# Passe à False si l'endpoint refuse response_format : les appels suivants s'en passent
+_structured_output_supported = True
+_REJECTED_RE = re.compile(r"\b(400|422)\b|response_format|unsupported|not supported|non supporté", re.IGNORECASE)
+
+def _response_format(schema: dict):
+    if HF_JSON_MODE == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": "gameforge_output", "schema": schema}}
+    if HF_JSON_MODE == "grammar":
+        return {"type": "json", "value": schema}
+    return None
+
+def chat_completion(prompt: str, max_tokens: int = 2000, use_cache: bool = True, response_format: dict = None) -> str:
+    """use_cache=False force un nouvel appel (régénération) ; le résultat remplace alors l'entrée en cache."""
+    temperature = 0.7
+    backend = get_text_backend()
+    cache = get_cache()
+    extra = {"response_format": response_format} if response_format else {}
+    key = make_key(backend.model, SYSTEM_INSTRUCTION, prompt, max_tokens, temperature, **extra)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"[HF LOG] chat_completion cache hit for prompt: {prompt}")
+            return cached
     print(f"[HF LOG] chat_completion called with prompt: {prompt}")
     messages = [
         {"role": "system", "content": SYSTEM_INSTRUCTION},
         {"role": "user", "content": prompt},
     ]
     try:
-        # Utilisation de conversational uniquement
-        resp = client.chat.completions.create(
-            model=HF_TEXT_MODEL,
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=0.7,
-        )
-        result = resp.choices[0].message.content.strip()
+        text, usage = backend.complete(messages, max_tokens=max_tokens, temperature=temperature, **extra)
+        result = text.strip()
         print(f"[HF LOG] chat_completion result: {result}")
+        _record_usage(usage)
+        if cache is not None:
+            cache.set(key, result)
         return result
     except Exception as e:
         print(f"[HF LOG] Hugging Face error: {e}")
         return f"[Erreur Hugging Face] {e}"
 
-def txt2img(prompt: str, width: int = 768, height: int = 512) -> bytes:
-    print(f"[HF LOG] txt2img called with prompt: {prompt}, size: {width}x{height}")
+def _rejects_response_format(error: str) -> bool:
+    """Erreur de refus explicite de response_format (HTTP 400/422, option non supportée), pas un incident passager."""
+    return bool(_REJECTED_RE.search(error))
+
+def chat_completion_json(prompt: str, schema: dict, max_tokens: int = 2000, use_cache: bool = True) -> str:
+    """
+    chat_completion avec sortie contrainte par le schéma JSON `schema` (décodage guidé par
+    l'endpoint). Retourne le texte brut, à lire avec json_output.parse_json_list. Si l'endpoint
+    refuse response_format, le mode contraint est désactivé et l'appel refait sans contrainte ;
+    une autre erreur (délai, 5xx) est retentée une fois, puis l'appel se passe de contrainte
+    sans changer le mode.
+    """
+    global _structured_output_supported
+    constrained = _structured_output_supported and get_text_backend().structured_output
+    response_format = _response_format(schema) if constrained else None
+    if response_format is None:
+        return chat_completion(prompt, max_tokens=max_tokens, use_cache=use_cache)
+    for attempt in range(2):
+        result = chat_completion(prompt, max_tokens=max_tokens, use_cache=use_cache, response_format=response_format)
+        if not result.startswith("[Erreur Hugging Face]"):
+            return result
+        if _rejects_response_format(result):
+            print("[HF LOG] response_format refusé, sortie JSON non contrainte désormais")
+            _structured_output_supported = False
+            break
+    return chat_completion(prompt, max_tokens=max_tokens, use_cache=use_cache)
+
+def chat_completion_stream(prompt: str, max_tokens: int = 2000, use_cache: bool = True) -> Iterator[str]:
+    """
+    Variante de chat_completion qui rend les tokens au fil de l'eau (stream=True).
+    Le texte complet est mis en cache à la fin ; un hit est rendu d'un seul bloc.
+    """
+    temperature = 0.7
+    backend = get_text_backend()
+    cache = get_cache()
+    key = make_key(backend.model, SYSTEM_INSTRUCTION, prompt, max_tokens, temperature)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"[HF LOG] chat_completion_stream cache hit for prompt: {prompt}")
+            yield cached
+            return
+    print(f"[HF LOG] chat_completion_stream called with prompt: {prompt}")
+    messages = [
+        {"role": "system", "content": SYSTEM_INSTRUCTION},
+        {"role": "user", "content": prompt},
+    ]
+    parts = []
     try:
-        model_id = HF_IMAGE_MODEL
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"[HF LOG] Diffusers device used: {device}")
-        if device == "cuda":
-                pipe = DiffusionPipeline.from_pretrained(model_id, torch_dtype=torch.float16)
-        else:
-                pipe = DiffusionPipeline.from_pretrained(model_id)
-        pipe = pipe.to(device)
-        image = pipe(prompt, height=height, width=width).images[0]
-        import io
+        for token in backend.stream(messages, max_tokens=max_tokens, temperature=temperature):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        print(f"[HF LOG] Hugging Face error: {e}")
+        yield f"[Erreur Hugging Face] {e}"
+        return
+    result = "".join(parts).strip()
+    print(f"[HF LOG] chat_completion_stream result: {result}")
+    if cache is not None and result:
+        cache.set(key, result)
+
+# Images : torch/diffusers ne sont importés que si le backend diffusers sert un rendu ou un
+# préchargement, jamais par les workers web qui ne font que servir des pages
+def warmup() -> None:
+    """Précharge les backends configurés (à appeler au démarrage d'un worker)."""
+    for backend in (get_text_backend(), get_image_backend()):
+        try:
+            backend.warmup()
+        except Exception as e:
+            print(f"[HF LOG] Warm-up failed for {type(backend).__name__}: {e}")
+
+# Réglages d'un palier transmis au backend (les autres clés sont traitées ici)
+_TIER_OPTIONS = ("scheduler", "attention_slicing", "vae_slicing", "channels_last", "compile")
+
+def image_tier(name: str | None = None) -> dict:
+    """Réglages du palier `name` (GAMEFORGE_IMAGE_TIERS), par défaut celui des créations."""
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+    name = name or settings.GAMEFORGE_CREATE_IMAGE_TIER
+    if name not in settings.GAMEFORGE_IMAGE_TIERS:
+        raise ImproperlyConfigured(f"Palier d'images inconnu : {name}")
+    return settings.GAMEFORGE_IMAGE_TIERS[name]
+
+def _upscale(data: bytes, size) -> bytes:
+    import io
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
         buf = io.BytesIO()
-        image.save(buf, format="PNG")
-        print(f"[HF LOG] txt2img image generated successfully.")
-        return buf.getvalue()
+        image.resize(tuple(size), Image.LANCZOS).save(buf, format="PNG")
+    return buf.getvalue()
+
+def txt2img_batch(
+    prompts: List[str],
+    seeds: List[int | None] | None = None,
+    tier: str | None = None,
+    model_id: str | None = None,
+) -> List[bytes]:
+    """
+    Génère plusieurs images en un appel du backend, avec les réglages du palier `tier`
+    (preview, standard, high). Un seed par prompt (None = aléatoire) ; à seed fixé, le rendu
+    est lu dans le cache des rendus s'il y est (render_cache). Retourne une liste de PNG,
+    b"" pour chaque échec.
+    """
+    from django.conf import settings
+    from .render_cache import get_render_cache, make_key as render_key
+    config = image_tier(tier)
+    width, height = config["width"], config["height"]
+    print(f"[HF LOG] txt2img_batch called with {len(prompts)} prompts, tier: {tier or 'défaut'}, size: {width}x{height}")
+    if not prompts:
+        return []
+    seeds = list(seeds or [None] * len(prompts))
+    options = {key: config[key] for key in _TIER_OPTIONS if key in config}
+    model_id = model_id or config.get("model")
+
+    cache = get_render_cache()
+    keys = [
+        render_key(
+            settings.GAMEFORGE_IMAGE_BACKEND, model_id or settings.HF_IMAGE_MODEL, prompt, seed,
+            width, height, config.get("steps"), options, config.get("upscale"),
+        ) if cache is not None and seed is not None else None
+        for prompt, seed in zip(prompts, seeds)
+    ]
+    images = [cache.get(key) if key else None for key in keys]
+    todo = [i for i, image in enumerate(images) if image is None]
+    if len(todo) < len(prompts):
+        print(f"[HF LOG] txt2img_batch render cache: {len(prompts) - len(todo)}/{len(prompts)} hits")
+    if not todo:
+        return images
+
+    try:
+        rendered = get_image_backend().txt2img_batch(
+            [prompts[i] for i in todo], [seeds[i] for i in todo], width, height,
+            steps=config.get("steps"), model_id=model_id, options=options,
+        )
     except Exception as e:
-        import traceback
-        print(f"[HF LOG] txt2img error: {e}")
-        traceback.print_exc()
-        return b""
+        print(f"[HF LOG] txt2img_batch error: {e}")
+        rendered = [b""] * len(todo)
+    for i, image in zip(todo, rendered):
+        if image and config.get("upscale"):
+            # Rendu réduit puis agrandi : le coût du débruitage suit le nombre de pixels rendus
+            image = _upscale(image, config["upscale"])
+        if image and keys[i]:
+            cache.set(keys[i], image)
+        images[i] = image
+    return images
+
+def txt2img(prompt: str, tier: str | None = None, model_id: str | None = None, seed: int | None = None) -> bytes:
+    return txt2img_batch([prompt], seeds=[seed], tier=tier, model_id=model_id)[0]
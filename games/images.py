@@ -0,0 +1,79 @@
+"""
+Stockage des images conceptuelles : encodage compressé (WebP/AVIF), déclinaisons
+en plusieurs largeurs et noms de fichiers dérivés du contenu.
+
+Convention de nommage : <prefix>_<hash>_<largeur>w.<ext>. La plus grande largeur est
+l'URL enregistrée sur le jeu ; les autres s'en déduisent (voir renditions()), ce qui
+permet aux templates d'émettre un srcset sans requête ni champ supplémentaire.
+"""
+import hashlib
+import io
+import os
+import re
+
+from django.conf import settings
+
+# Largeurs des déclinaisons (vignette des grilles, taille moyenne) ; l'original est toujours gardé
+RENDITION_WIDTHS = (320, 640)
+
+_NAME_RE = re.compile(r"^(?P<stem>.+_[0-9a-f]{16})_(?P<width>\d+)w\.(?P<ext>webp|avif)$")
+
+
+def _format():
+    fmt = getattr(settings, "GAMEFORGE_IMAGE_FORMAT", "webp").lower()
+    if fmt == "avif":
+        from PIL import features
+        if not features.check("avif"):
+            fmt = "webp"
+    return fmt
+
+
+def _media_root():
+    return str(getattr(settings, "MEDIA_ROOT", os.path.join(settings.BASE_DIR, "media")))
+
+
+def store_image(data: bytes, prefix: str):
+    """Enregistre l'image et ses déclinaisons ; retourne l'URL de la pleine taille (None si data est vide)."""
+    if not data:
+        return None
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    fmt = _format()
+    quality = getattr(settings, "GAMEFORGE_IMAGE_QUALITY", 80)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    media_root = _media_root()
+    os.makedirs(media_root, exist_ok=True)
+
+    full_name = f"{prefix}_{digest}_{image.width}w.{fmt}"
+    widths = [w for w in RENDITION_WIDTHS if w < image.width] + [image.width]
+    for width in widths:
+        filename = f"{prefix}_{digest}_{width}w.{fmt}"
+        path = os.path.join(media_root, filename)
+        if os.path.exists(path):
+            # Rendu identique déjà stocké : dédupliqué par le hash
+            continue
+        if width == image.width:
+            resized = image
+        else:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        tmp_path = path + ".tmp"
+        resized.save(tmp_path, format=fmt.upper(), quality=quality)
+        os.replace(tmp_path, path)
+    return settings.MEDIA_URL + full_name
+
+
+def renditions(url):
+    """[(url, largeur), ...] du plus petit au plus grand ; [] pour une URL externe ou un ancien PNG."""
+    if not url:
+        return []
+    base, _, name = str(url).rpartition("/")
+    m = _NAME_RE.match(name)
+    if not m:
+        return []
+    full_width = int(m.group("width"))
+    widths = [w for w in RENDITION_WIDTHS if w < full_width] + [full_width]
+    return [(f"{base}/{m.group('stem')}_{w}w.{m.group('ext')}", w) for w in widths]
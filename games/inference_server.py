@@ -0,0 +1,200 @@
+"""
+Serveur d'inférence local (manage.py inference_server) : un processus garde le pipeline d'images
+et le modèle de texte chargés, les workers web et de génération l'appellent via le backend
+"server" (games/backends/server.py).
+
+Les rendus d'images concurrents sont regroupés : le premier prompt en attente ouvre une fenêtre
+de max_wait_ms pendant laquelle les prompts de même format (taille, étapes, modèle, réglages
+du palier) rejoignent son lot, jusqu'à max_batch. Un seul lot tourne à la fois ; pendant ce temps les suivants
+s'accumulent, si bien que la taille des lots suit la charge.
+"""
+from __future__ import annotations
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+
+class ImageBatcher:
+    def __init__(self, backend, max_batch=8, max_wait_ms=50):
+        self.backend = backend
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = []  # [(format, prompt, seed, Future)]
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "images": 0, "max_batch_seen": 0}
+        threading.Thread(target=self._loop, name="gameforge-batcher", daemon=True).start()
+
+    def submit(self, prompts, seeds, width, height, steps=None, model_id=None, options=None):
+        """
+        Un Future par prompt, résolu avec le PNG (b"" si le backend échoue sur ce prompt) ; en
+        exception si le lot entier échoue (erreur du backend, nombre d'images incohérent).
+        """
+        fmt = (width, height, steps, model_id, json.dumps(options or {}, sort_keys=True))
+        futures = [Future() for _ in prompts]
+        with self._cond:
+            self._queue.extend((fmt, prompt, seed, future) for prompt, seed, future in zip(prompts, seeds, futures))
+            self._cond.notify()
+        return futures
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            fmt = self._queue[0][0]
+            deadline = time.monotonic() + self.max_wait
+            while True:
+                batch = [item for item in self._queue if item[0] == fmt][:self.max_batch]
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.max_batch or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken = {id(item) for item in batch}
+            self._queue = [item for item in self._queue if id(item) not in taken]
+        return fmt, batch
+
+    def _loop(self):
+        while True:
+            (width, height, steps, model_id, options), batch = self._next_batch()
+            try:
+                images = self.backend.txt2img_batch(
+                    [item[1] for item in batch], [item[2] for item in batch], width, height,
+                    steps=steps, model_id=model_id, options=json.loads(options),
+                )
+                if len(images) != len(batch):
+                    raise RuntimeError(f"{len(images)} images rendues pour {len(batch)} prompts")
+                for item, image in zip(batch, images):
+                    item[3].set_result(image)
+            except Exception as e:
+                print(f"[HF LOG] batch of {len(batch)} failed: {e}")
+            finally:
+                # Chaque requête HTTP attend son Future : aucun ne doit rester en suspens
+                for item in batch:
+                    if not item[3].done():
+                        item[3].set_exception(RuntimeError(f"rendu du lot échoué ({len(batch)} prompts)"))
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["images"] += len(batch)
+                self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch"] = stats["images"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Renseignés par make_server
+    text_backend = None
+    batcher = None
+
+    def address_string(self):
+        # Socket Unix : pas d'adresse IP cliente
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _payload(self):
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/v1/info":
+            # Modèle réel et capacités du backend texte : clé du cache LLM et sortie contrainte côté client
+            return self._json({
+                "text_model": self.text_backend.model,
+                "structured_output": self.text_backend.structured_output,
+            })
+        if self.path != "/health":
+            return self._json({"error": "not found"}, status=404)
+        self._json({
+            "text_backend": type(self.text_backend).__name__,
+            "text_model": self.text_backend.model,
+            "image_backend": type(self.batcher.backend).__name__,
+            "batching": {"max_batch": self.batcher.max_batch, "max_wait_ms": self.batcher.max_wait * 1000},
+            "stats": self.batcher.stats(),
+        })
+
+    def do_POST(self):
+        try:
+            data = self._payload()
+            if self.path == "/v1/images":
+                return self._images(data)
+            if self.path == "/v1/chat":
+                return self._chat(data)
+            if self.path == "/v1/chat/stream":
+                return self._chat_stream(data)
+            self._json({"error": "not found"}, status=404)
+        except Exception as e:
+            print(f"[HF LOG] inference server error on {self.path}: {e}")
+            self._json({"error": str(e)}, status=500)
+
+    def _images(self, data):
+        prompts = data["prompts"]
+        futures = self.batcher.submit(
+            prompts, data.get("seeds") or [None] * len(prompts), data["width"], data["height"],
+            steps=data.get("steps"), model_id=data.get("model_id"), options=data.get("options"),
+        )
+        self._json({"images": [base64.b64encode(future.result()).decode("ascii") for future in futures]})
+
+    def _chat(self, data):
+        response_format = data.get("response_format") if self.text_backend.structured_output else None
+        text, usage = self.text_backend.complete(
+            data["messages"], max_tokens=data["max_tokens"], temperature=data["temperature"],
+            response_format=response_format,
+        )
+        usage = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        } if usage is not None else None
+        self._json({"text": text, "usage": usage})
+
+    def _chat_stream(self, data):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in self.text_backend.stream(data["messages"], max_tokens=data["max_tokens"], temperature=data["temperature"]):
+                line = (json.dumps({"token": token}) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+        except Exception as e:
+            # En-têtes déjà envoyés : la réponse est coupée sans chunk final, le client lève une erreur
+            print(f"[HF LOG] inference server stream error: {e}")
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address, text_backend, image_backend, max_batch=8, max_wait_ms=50):
+    """address : ("tcp", (hôte, port)) ou ("unix", chemin), cf. backends.server.parse_address."""
+    handler = type("Handler", (InferenceHandler,), {
+        "text_backend": text_backend,
+        "batcher": ImageBatcher(image_backend, max_batch=max_batch, max_wait_ms=max_wait_ms),
+    })
+    kind, bind = address
+    if kind == "unix":
+        if os.path.exists(bind):
+            os.unlink(bind)
+        return ThreadingUnixHTTPServer(bind, handler)
+    return ThreadingHTTPServer(bind, handler)
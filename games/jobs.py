@@ -0,0 +1,130 @@
+"""
+File de générations IA : les vues enregistrent un GenerationJob, le worker
+(manage.py generation_worker) les dépile et exécute le pipeline hors requête HTTP.
+"""
+import datetime
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import quota
+from .models import Game, GenerationJob
+from .services import persist_generated_game
+
+
+# Palier des images refaites à la demande sur un jeu enregistré (cf. GAMEFORGE_IMAGE_TIERS)
+UPGRADE_TIER = "high"
+
+
+def enqueue(user, kind, params=None):
+    return GenerationJob.objects.create(user=user, kind=kind, params=params or {})
+
+
+def claim_next():
+    """Réserve le plus ancien job en attente (UPDATE conditionnel : sûr entre plusieurs workers)."""
+    while True:
+        job = GenerationJob.objects.filter(status=GenerationJob.STATUS_PENDING).order_by('created_at').first()
+        if job is None:
+            return None
+        claimed = GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.STATUS_PENDING).update(
+            status=GenerationJob.STATUS_RUNNING
+        )
+        if claimed:
+            job.status = GenerationJob.STATUS_RUNNING
+            return job
+
+
+def _refund(job):
+    if job.params.get('quota_day'):
+        quota.refund(job.user, datetime.date.fromisoformat(job.params['quota_day']))
+
+
+def reap_stale():
+    """
+    Passe en échec les jobs "running" sans progression depuis GAMEFORGE_JOB_LEASE secondes
+    (worker tué ou planté) et rend leur réservation de quota. Retourne les jobs concernés.
+    Pas de reprise automatique : le worker a pu enregistrer le jeu avant de mourir.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.GAMEFORGE_JOB_LEASE)
+    reaped = []
+    stale = GenerationJob.objects.filter(status=GenerationJob.STATUS_RUNNING, updated_at__lt=cutoff).select_related('user')
+    for job in stale:
+        # UPDATE conditionnel : un seul worker rend le quota d'un job donné
+        failed = GenerationJob.objects.filter(
+            pk=job.pk, status=GenerationJob.STATUS_RUNNING, updated_at__lt=cutoff
+        ).update(status=GenerationJob.STATUS_FAILED, error="Génération interrompue (worker arrêté)", updated_at=timezone.now())
+        if failed:
+            _refund(job)
+            reaped.append(job)
+    return reaped
+
+
+def _stage_recorder(job):
+    def on_stage(stage):
+        job.progress = job.progress + [stage]
+        job.save(update_fields=['progress', 'updated_at'])
+    return on_stage
+
+
+def _run_create(job):
+    from django.conf import settings
+    from .ai import generate_all
+    p = job.params
+    tier = settings.GAMEFORGE_CREATE_IMAGE_TIER
+    universe, story, locations, characters, char_img, env_img = generate_all(
+        p['title'], p['genre'], p['ambiance'], p['keywords'], p.get('references'),
+        on_stage=_stage_recorder(job), image_tier=tier,
+    )
+    game = persist_generated_game(job.user, {
+        **p, 'universe': universe, 'story': story, 'locations': locations, 'characters': characters,
+        'character_image_url': char_img, 'environment_image_url': env_img, 'image_tier': tier,
+    }, is_public=p.get('is_public', False))
+    job.game = game
+    job.result = {'game_id': game.pk}
+
+
+def _run_explore(job):
+    from .ai import generate_random_game
+    job.result = generate_random_game(
+        on_stage=_stage_recorder(job), use_cache=not job.params.get('regen', False)
+    )
+
+
+def _run_upgrade(job):
+    """Refait les images d'un jeu enregistré au palier "high", à partir de son contenu."""
+    from .ai import generate_concept_image_urls
+    game = Game.objects.get(pk=job.params['game_id'], user=job.user)
+    characters = list(game.characters.values('name', 'role', 'abilities', 'motivation'))
+    char_img, env_img = generate_concept_image_urls(
+        game.genre, game.ambiance, game.keywords, title=game.title, characters=characters,
+        locations=game.locations, story=game.story, tier=UPGRADE_TIER,
+    )
+    game.character_image_url, game.environment_image_url = char_img, env_img
+    game.image_tier = UPGRADE_TIER
+    # Signal post_save : caches du détail et des listes invalidés
+    game.save(update_fields=['character_image_url', 'environment_image_url', 'image_tier'])
+    _stage_recorder(job)("images")
+    job.game = game
+    job.result = {'game_id': game.pk}
+
+
+RUNNERS = {
+    GenerationJob.KIND_CREATE: _run_create,
+    GenerationJob.KIND_EXPLORE: _run_explore,
+    GenerationJob.KIND_UPGRADE: _run_upgrade,
+}
+
+
+def run_job(job):
+    try:
+        RUNNERS[job.kind](job)
+        job.status = GenerationJob.STATUS_DONE
+    except Exception as e:
+        traceback.print_exc()
+        job.status = GenerationJob.STATUS_FAILED
+        job.error = str(e) or e.__class__.__name__
+        # Génération non livrée : la réservation faite par la vue est rendue
+        _refund(job)
+    job.save()
+    return job
@@ -0,0 +1,153 @@
+"""
+Lecture tolérante des sorties JSON du LLM.
+
+parse_json_list() extrait la liste d'objets d'une réponse même entourée de texte ou de
+balises ```json, emballée dans un objet ({"characters": [...]}) ou tronquée par max_tokens :
+les éléments sont décodés un à un (JSONDecoder.raw_decode) et le premier élément incomplet
+arrête la lecture, les précédents sont gardés. parse_json_object() fait de même pour les
+membres d'un objet (document de génération « one-shot »).
+Chaque lecture alimente des compteurs (stats()) : réponses valides, récupérées, perdues.
+"""
+from __future__ import annotations
+import json
+import re
+import threading
+from typing import Iterable, List, Tuple
+
+OK, RECOVERED, FAILED = "ok", "recovered", "failed"
+
+_decoder = json.JSONDecoder()
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+
+class ParseStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {OK: 0, RECOVERED: 0, FAILED: 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {
+            **counts,
+            "total": total,
+            # Réponses exploitables (valides ou récupérées) / réponses reçues
+            "success_rate": (counts[OK] + counts[RECOVERED]) / total if total else 0.0,
+        }
+
+
+_stats = ParseStats()
+
+
+def stats() -> dict:
+    return _stats.as_dict()
+
+
+def _as_list(value, required: Iterable[str] = ()):
+    """
+    Liste d'objets d'une valeur JSON : la liste elle-même, la première liste d'un objet, ou
+    [objet] si l'objet a lui-même les clés `required` d'un élément. Sinon [] ({"characters": []},
+    {"error": ...}) : la réponse compte comme perdue et l'appelant passe à sa valeur par défaut.
+    """
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, dict)]
+    if isinstance(value, dict):
+        for item in value.values():
+            if isinstance(item, list) and item and all(isinstance(x, dict) for x in item):
+                return item
+        required = list(required)
+        if required and all(key in value for key in required):
+            return [value]
+    return []
+
+
+def _scan_objects(text: str, pos: int) -> List[dict]:
+    """Décode les objets complets à partir de `pos` ; s'arrête au premier élément illisible ou à ']'."""
+    items = []
+    while True:
+        pos = _skip(text, pos, " \t\r\n,")
+        if pos >= len(text) or text[pos] == "]":
+            break
+        try:
+            value, pos = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            # Élément tronqué (max_tokens) ou texte libre : on garde ce qui précède
+            break
+        if isinstance(value, dict):
+            items.append(value)
+    return items
+
+
+def parse_json_list(raw: str, required: Iterable[str] = ()) -> Tuple[List[dict], str]:
+    """
+    Retourne (objets, issue) avec issue OK, RECOVERED ou FAILED ; l'issue est comptée dans stats().
+    required : clés d'un élément, pour reconnaître un objet isolé (cf. _as_list).
+    """
+    required = tuple(required)
+    text = _FENCE_RE.sub("", (raw or "").strip())
+    items, outcome = [], FAILED
+    try:
+        items = _as_list(json.loads(text), required)
+        outcome = OK if items else FAILED
+    except ValueError:
+        start = text.find("[")
+        if start == -1:
+            start = text.find("{")
+            objects = _scan_objects(text, start) if start != -1 else []
+            items = [item for obj in objects for item in _as_list(obj, required)]
+        else:
+            items = _scan_objects(text, start + 1)
+            if not items:
+                # Crochet dans le texte libre avant la liste : on essaie le suivant
+                inner = text.find("[", start + 1)
+                items = _scan_objects(text, inner + 1) if inner != -1 else []
+        outcome = RECOVERED if items else FAILED
+    _stats.record(outcome)
+    return items, outcome
+
+
+def _skip(text: str, pos: int, chars: str = " \t\r\n") -> int:
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _scan_members(text: str, pos: int) -> dict:
+    """Décode les paires clé/valeur complètes d'un objet à partir de `pos` (après l'accolade)."""
+    members = {}
+    while True:
+        pos = _skip(text, pos, " \t\r\n,")
+        if pos >= len(text) or text[pos] == "}":
+            break
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+            pos = _skip(text, pos)
+            if not isinstance(key, str) or pos >= len(text) or text[pos] != ":":
+                break
+            value, pos = _decoder.raw_decode(text, _skip(text, pos + 1))
+        except json.JSONDecodeError:
+            # Valeur tronquée : les membres précédents sont gardés
+            break
+        members[key] = value
+    return members
+
+
+def parse_json_object(raw: str) -> Tuple[dict, str]:
+    """Retourne (membres, issue) ; un objet tronqué garde ses membres complets. Compté dans stats()."""
+    text = _FENCE_RE.sub("", (raw or "").strip())
+    members, outcome = {}, FAILED
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            members, outcome = value, OK
+    except ValueError:
+        start = text.find("{")
+        members = _scan_members(text, start + 1) if start != -1 else {}
+        outcome = RECOVERED if members else FAILED
+    _stats.record(outcome)
+    return members, outcome
@@ -0,0 +1,192 @@
+"""
+Cache des réponses chat_completion, adressé par contenu.
+
+La clé est un hash de (modèle, instruction système, prompt, max_tokens, température) :
+deux prompts identiques ne repartent pas vers l'endpoint. Deux niveaux :
+- MemoryTier : LRU en mémoire du processus ;
+- SQLiteTier : fichier SQLite partagé entre processus (web, worker), survit aux redémarrages.
+Les deux appliquent un TTL et une taille maximale (éviction du moins récemment utilisé).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from django.conf import settings
+
+
+def make_key(model: str, system: str, prompt: str, max_tokens: int, temperature: float, **extra) -> str:
+    payload = {
+        "model": model, "system": system, "prompt": prompt,
+        "max_tokens": max_tokens, "temperature": temperature, **extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    def __init__(self, max_entries: int = 512, ttl: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created_at, value = item
+            if time.time() - created_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTier:
+    def __init__(self, path: str, max_entries: int = 50_000, ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Interroge les niveaux dans l'ordre ; un hit sur un niveau lent remplit les niveaux rapides."""
+
+    def __init__(self, tiers: List):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        # Compteurs partagés par les threads du pool LLM (appels en parallèle)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": [len(tier) for tier in self.tiers],
+        }
+
+
+_UNSET = object()
+_cache = _UNSET
+_cache_lock = threading.Lock()
+
+
+def _build_from_settings() -> Optional[ResponseCache]:
+    if not settings.HF_CACHE:
+        return None
+    ttl = settings.HF_CACHE_TTL
+    tiers = [MemoryTier(settings.HF_CACHE_MAX_ENTRIES, ttl)]
+    if settings.HF_CACHE_DB:
+        tiers.append(SQLiteTier(settings.HF_CACHE_DB, settings.HF_CACHE_DB_MAX_ENTRIES, ttl))
+    return ResponseCache(tiers)
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Cache configuré par les settings HF_CACHE*, None s'il est désactivé."""
+    global _cache
+    with _cache_lock:
+        if _cache is _UNSET:
+            _cache = _build_from_settings()
+        return _cache
+
+
+def set_cache(cache: Optional[ResponseCache]) -> None:
+    """Remplace le cache du processus (autres niveaux, tests, désactivation)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from games.models import Game, Character
+from games.services import persist_generated_game, persist_generated_games
+
+
+def _sample(i):
+    return {
+        "title": f"Jeu importé {i}", "genre": Game.GENRES[i % len(Game.GENRES)][0],
+        "ambiance": "Sombre", "keywords": "ruines, IA rebelle", "references": "",
+        "universe": "Un monde en ruines. " * 20, "story": "Acte 1... Acte 2... Acte 3... " * 20,
+        "locations": "La Citadelle, Le Marais, Les Hauts", "character_image_url": None, "environment_image_url": None,
+        "characters": [
+            {"name": f"Perso {i}-{n}", "role": "Héros", "abilities": "Épée", "motivation": "Vengeance"}
+            for n in range(3)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit d'enregistrement de jeux générés : boucle de create() en autocommit "
+        "(ancien code), persist_generated_game() (une transaction par jeu) et persist_generated_games() "
+        "(import par lots). Les données créées sont supprimées à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=2000, help="Nombre de jeux par mode.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Taille des lots de l'import en masse.")
+
+    def _legacy(self, user, items):
+        for data in items:
+            game = Game.objects.create(user=user, **{k: v for k, v in data.items() if k != "characters"})
+            for ch in data["characters"]:
+                Character.objects.create(game=game, **ch)
+
+    def _per_game(self, user, items):
+        for data in items:
+            persist_generated_game(user, data)
+
+    def handle(self, *args, **options):
+        items = [_sample(i) for i in range(options['games'])]
+        modes = [
+            ("boucle create() (autocommit)", self._legacy),
+            ("persist_generated_game", self._per_game),
+            ("persist_generated_games", lambda user, data: persist_generated_games(user, data, batch_size=options['batch_size'])),
+        ]
+        user = User.objects.create_user('bench-bulk-import')
+        try:
+            for label, run in modes:
+                started = time.perf_counter()
+                run(user, items)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{label:32s} {elapsed:7.2f} s  {len(items) / elapsed:8.0f} jeux/s")
+        finally:
+            # Supprime jeux, personnages et entrées d'index (signaux post_delete)
+            user.delete()
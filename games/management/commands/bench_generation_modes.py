@@ -0,0 +1,39 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from games import hf_client
+from games.ai import generate_all
+
+SAMPLE = ("Les Cendres d'Orion", "Science-Fiction", "sombre", "exil, mémoire, vaisseau", "Dune, Alien")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les modes de génération du texte (GAMEFORGE_GENERATION_MODE) : durée, appels LLM "
+        "et tokens par jeu. Cache LLM ignoré, images non rendues ; appels réels au modèle configuré."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Générations par mode.")
+        parser.add_argument('--modes', default='parallel,oneshot')
+
+    def handle(self, *args, **options):
+        for mode in options['modes'].split(','):
+            timings = []
+            before = hf_client.usage_stats()
+            with override_settings(GAMEFORGE_GENERATION_MODE=mode):
+                for _ in range(options['runs']):
+                    started = time.perf_counter()
+                    generate_all(*SAMPLE, use_cache=False, render_images=False)
+                    timings.append(time.perf_counter() - started)
+            after = hf_client.usage_stats()
+            runs = options['runs']
+            per_game = {key: (after[key] - before[key]) / runs for key in after}
+            self.stdout.write(
+                f"{mode:9s} : {statistics.median(timings):6.2f} s/jeu (médiane), "
+                f"{per_game['calls']:.1f} appels, {per_game['prompt_tokens']:.0f} tokens prompt + "
+                f"{per_game['completion_tokens']:.0f} générés = {per_game['total_tokens']:.0f} tokens/jeu"
+            )
@@ -0,0 +1,72 @@
+import random
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from games.ai import harmonize_names
+
+
+def _legacy_replace_names(story, chars):
+    # Ancienne implémentation (replace_names_in_story), gardée comme référence de mesure
+    names = [ch['name'] for ch in chars]
+    lines = story.splitlines()
+    act_pattern = re.compile(r'^(Acte|\*\*|#)', re.IGNORECASE)
+    name_pattern = r'\b([A-Z][a-zA-Zéèêëàâäôöûüç]{2,})\b'
+    replaced_lines = []
+    generated_names = set(names)
+    for line in lines:
+        if act_pattern.match(line.strip()):
+            replaced_lines.append(line)
+        else:
+            found = re.findall(name_pattern, line)
+            new_line = line
+            replaceable = [n for n in set(found) if n not in generated_names]
+            for i, old_name in enumerate(replaceable):
+                new_name = names[i % len(names)]
+                new_line = re.sub(rf'\b{re.escape(old_name)}\b', new_name, new_line)
+            replaced_lines.append(new_line)
+    return '\n'.join(replaced_lines)
+
+
+def _story(n_lines, n_names, seed=0):
+    rng = random.Random(seed)
+    names = [f"Nom{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}" for i in range(n_names)]
+    lines = []
+    for i in range(n_lines):
+        if i % 40 == 0:
+            lines.append(f"Acte {i // 40 + 1} : {rng.choice(names)} se réveille")
+            continue
+        a, b = rng.sample(names, 2)
+        lines.append(f"Dans la cité, {a} rencontre {b} et lui confie le secret de la {rng.choice(names)}.")
+    return "\n".join(lines)
+
+
+class Command(BaseCommand):
+    help = "Compare l'harmonisation des noms (ai.harmonize_names) à l'ancienne implémentation sur des scénarios longs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', default='50,500,5000', help="Tailles de scénario, en lignes.")
+        parser.add_argument('--names', type=int, default=30, help="Noms distincts dans le scénario.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _time(self, func, story, chars, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(story, chars)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        chars = [{'name': name} for name in ("Kael", "Lyra", "Orin")]
+        for n_lines in (int(n) for n in options['lines'].split(',')):
+            story = _story(n_lines, options['names'])
+            legacy = self._time(_legacy_replace_names, story, chars, options['repeat'])
+            current = self._time(harmonize_names, story, chars, options['repeat'])
+            stable = harmonize_names(story, chars) == harmonize_names(story, chars)
+            self.stdout.write(
+                f"{n_lines:6d} lignes : ancienne {legacy:9.2f} ms, harmonize_names {current:8.2f} ms "
+                f"(x{legacy / current:5.1f}), résultat déterministe : {'oui' if stable else 'non'}"
+            )
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from games.hf_client import image_tier, txt2img_batch
+
+PROMPT = "Concept art d'un héros pour un jeu intitulé 'Les Cendres d'Orion' (Science-Fiction, ambiance sombre)."
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les secondes par image de chaque palier de qualité (GAMEFORGE_IMAGE_TIERS) avec le "
+        "backend d'images configuré (diffusers par défaut : rendu local, CPU si pas de GPU). "
+        "Une image de chauffe par palier n'est pas comptée (scheduler, compile)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tiers', default=','.join(settings.GAMEFORGE_IMAGE_TIERS))
+        parser.add_argument('--images', type=int, default=2, help="Images mesurées par palier.")
+        parser.add_argument('--backend', default=None, help="Backend d'images (défaut : GAMEFORGE_IMAGE_BACKEND).")
+
+    def handle(self, *args, **options):
+        backend = options['backend'] or settings.GAMEFORGE_IMAGE_BACKEND
+        with override_settings(GAMEFORGE_IMAGE_BACKEND=backend):
+            self.stdout.write(f"Backend d'images : {backend}")
+            for tier in options['tiers'].split(','):
+                config = image_tier(tier)
+                txt2img_batch([PROMPT], seeds=[0], tier=tier)
+                timings, failed = [], 0
+                for i in range(options['images']):
+                    started = time.perf_counter()
+                    image, = txt2img_batch([PROMPT], seeds=[i + 1], tier=tier)
+                    timings.append(time.perf_counter() - started)
+                    failed += not image
+                rendered = f"{config['width']}x{config['height']}"
+                if config.get('upscale'):
+                    rendered += " -> {}x{}".format(*config['upscale'])
+                self.stdout.write(
+                    f"{tier:9s} {sum(timings) / len(timings):7.2f} s/image  ({config.get('scheduler', 'default')}, "
+                    f"{config.get('steps')} étapes, {rendered})  échecs : {failed}"
+                )
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+HEAVY_MODULES = ("torch", "diffusers", "transformers", "huggingface_hub")
+
+# Chaque scénario tourne dans un processus neuf (python -X importtime)
+SCENARIOS = {
+    "check": "from django.core.management import call_command; call_command('check', verbosity=0)",
+    "web": "import gameforge.wsgi, gameforge.urls, games.views",
+    "ai": "import games.ai",
+    "diffusion": "import games.backends.diffusion",
+}
+
+REPORT = (
+    "import resource, sys, json; print(json.dumps({"
+    "'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "
+    "'heavy': [m for m in %r if m in sys.modules]}))" % (HEAVY_MODULES,)
+)
+
+
+def _parse_importtime(stderr):
+    """[(cumul µs, module)] d'après les lignes « import time: self | cumulative | name »."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name[1:].rstrip()))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le temps d'import et la mémoire (RSS max) au démarrage : manage.py check, worker web, "
+        "games.ai (texte) et games.backends.diffusion (rendu local). Indique si torch/diffusers sont chargés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+        parser.add_argument('--top', type=int, default=5, help="Imports les plus lents affichés par scénario.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="gameforge.settings", HF_WARMUP="False")
+        for name in options['scenarios'].split(','):
+            code = f"import django; django.setup(); {SCENARIOS[name]}\n{REPORT}"
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", code],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                self.stderr.write(f"{name:10s} échec : {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+            rows = _parse_importtime(proc.stderr)
+            # Modules de premier niveau (non indentés) : leur cumul couvre tout le reste
+            total = sum(cumulative for cumulative, module in rows if not module.startswith(" ")) / 1e6
+            heavy = ", ".join(report['heavy']) or "aucun"
+            self.stdout.write(
+                f"{name:10s} imports {total:6.2f} s  RSS max {report['rss_mb']:7.1f} Mo  modules lourds : {heavy}"
+            )
+            for cumulative, module in sorted(rows, reverse=True)[:options['top']]:
+                self.stdout.write(f"{'':12s}{cumulative / 1e6:6.2f} s  {module.strip()}")
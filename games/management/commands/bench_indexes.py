@@ -0,0 +1,123 @@
+import datetime
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from games.models import DailyQuota, Game
+from games.views import _day_range
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les requêtes des listes de jeux (plan d'exécution et durée) avec et sans les index "
+        "composites de Game. Les données sont créées dans une transaction annulée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100_000, help="Nombre de jeux à créer.")
+        parser.add_argument('--users', type=int, default=200, help="Nombre d'auteurs.")
+        parser.add_argument('--repeat', type=int, default=5, help="Exécutions par requête (médiane retenue).")
+
+    def _seed(self, n_games, n_users):
+        users = User.objects.bulk_create([User(username=f'bench-indexes-{i}') for i in range(n_users)])
+        genres = [key for key, _ in Game.GENRES]
+        Game.objects.bulk_create(
+            (
+                Game(
+                    user=users[i % n_users], title=f"Jeu {i}", genre=genres[i % len(genres)],
+                    ambiance="Sombre", keywords="k", is_public=i % 10 < 7,
+                )
+                for i in range(n_games)
+            ),
+            batch_size=1000,
+        )
+        # auto_now_add impose la date courante : on étale ensuite les jeux par tranches de 50, 2 h d'écart
+        ids = list(Game.objects.filter(user__in=users).order_by('id').values_list('id', flat=True))
+        now = timezone.now()
+        for n, start in enumerate(range(0, len(ids), 50)):
+            chunk = ids[start:start + 50]
+            Game.objects.filter(id__gte=chunk[0], id__lte=chunk[-1]).update(
+                created_at=now - datetime.timedelta(hours=2 * n)
+            )
+        # Compteurs de quota correspondants (un par auteur et par jour, cf. games/quota.py)
+        per_day = (
+            Game.objects.filter(user__in=users).annotate(day=TruncDate('created_at'))
+            .values('user_id', 'day').annotate(n=Count('id'))
+        )
+        DailyQuota.objects.bulk_create(
+            (DailyQuota(user_id=row['user_id'], day=row['day'], used=row['n']) for row in per_day), batch_size=1000,
+        )
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return users, genres, now
+
+    def _queries(self, user, genre, day):
+        start, end = _day_range(day)
+        page = getattr(settings, 'GAMEFORGE_PAGE_SIZE', 24) + 1
+        recent = ('-created_at', '-id')
+        public = Game.objects.filter(is_public=True)
+        return [
+            ("accueil", public.order_by(*recent)[:page]),
+            ("accueil + genre", public.filter(genre=genre).order_by(*recent)[:page]),
+            ("accueil + date (__date)", public.filter(created_at__date=day).order_by(*recent)[:page]),
+            ("accueil + date (intervalle)", public.filter(created_at__gte=start, created_at__lt=end).order_by(*recent)[:page]),
+            ("tableau de bord", Game.objects.filter(user=user).order_by(*recent)[:page]),
+            # Lecture de quota.usage() ; l'index unique (user, day) de DailyQuota reste en place dans les deux phases
+            ("quota du jour", DailyQuota.objects.filter(user=user, day=day).values_list('used', flat=True)),
+        ]
+
+    def _measure(self, queries, repeat, tag):
+        results = {}
+        for label, qs in queries:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(qs.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = (statistics.median(timings), self._explain(qs, tag))
+        return results
+
+    def _explain(self, qs, tag):
+        # Commentaire distinct par phase : sqlite3 garde en cache les EXPLAIN déjà préparés,
+        # qui ne sont pas replanifiés après un DROP INDEX
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql} /* {tag} */", params)
+            return " | ".join(str(row[-1]).strip() for row in cursor.fetchall())
+
+    def handle(self, *args, **options):
+        index_names = [index.name for index in Game._meta.indexes]
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Création de {options['games']} jeux...")
+                users, genres, now = self._seed(options['games'], options['users'])
+                day = timezone.localdate(now - datetime.timedelta(days=3))
+                queries = self._queries(users[0], genres[0], day)
+
+                after = self._measure(queries, options['repeat'], 'avec index')
+                with connection.cursor() as cursor:
+                    for name in index_names:
+                        cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+                before = self._measure(queries, options['repeat'], 'sans index')
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        for label, _ in queries:
+            ms_before, plan_before = before[label]
+            ms_after, plan_after = after[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  sans index : {ms_before:8.2f} ms  {plan_before}")
+            self.stdout.write(f"  avec index : {ms_after:8.2f} ms  {plan_after}")
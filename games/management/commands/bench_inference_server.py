@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from games.backends import get_image_backend, get_text_backend
+from games.backends.server import ServerImageBackend, call, parse_address
+from games.inference_server import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge le serveur d'inférence avec N clients concurrents (une image par requête) et affiche "
+        "images/minute et taille moyenne des lots par niveau de concurrence. --inline démarre un "
+        "serveur dans le processus, avec le backend d'images fake par défaut (mesure hors ligne)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,2,4,8,16')
+        parser.add_argument('--seconds', type=float, default=10, help="Durée par niveau.")
+        parser.add_argument('--size', type=int, default=512, help="Côté des images (carrées).")
+        parser.add_argument('--inline', action='store_true', help="Démarrer un serveur dans ce processus.")
+        parser.add_argument('--image-backend', default='fake', help="Backend du serveur --inline.")
+        parser.add_argument('--url', default='http://127.0.0.1:8766', help="Adresse du serveur --inline.")
+        parser.add_argument('--max-batch', type=int, default=8)
+        parser.add_argument('--max-wait-ms', type=float, default=50)
+
+    def handle(self, *args, **options):
+        if not options['inline']:
+            return self._run(options)
+        server = make_server(
+            parse_address(options['url']), get_text_backend('fake'), get_image_backend(options['image_backend']),
+            max_batch=options['max_batch'], max_wait_ms=options['max_wait_ms'],
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with override_settings(GAMEFORGE_INFERENCE_URL=options['url']):
+                self._run(options)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _client(self, n, deadline, size, counts, lock):
+        backend = ServerImageBackend()
+        done = failed = i = 0
+        while time.monotonic() < deadline:
+            image, = backend.txt2img_batch([f"bench client {n} image {i}"], [i], size, size)
+            if image:
+                done += 1
+            else:
+                failed += 1
+            i += 1
+        with lock:
+            counts['images'] += done
+            counts['failed'] += failed
+
+    def _run(self, options):
+        for concurrency in (int(c) for c in options['concurrency'].split(',')):
+            before = call("GET", "/health")["stats"]
+            counts, lock = {'images': 0, 'failed': 0}, threading.Lock()
+            deadline = time.monotonic() + options['seconds']
+            started = time.monotonic()
+            threads = [
+                threading.Thread(target=self._client, args=(n, deadline, options['size'], counts, lock))
+                for n in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+            after = call("GET", "/health")["stats"]
+            batches = after['batches'] - before['batches']
+            avg_batch = (after['images'] - before['images']) / batches if batches else 0.0
+            self.stdout.write(
+                f"{concurrency:3d} clients : {counts['images'] / elapsed * 60:8.1f} images/min, "
+                f"lots de {avg_batch:4.1f} en moyenne, échecs : {counts['failed']}"
+            )
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from games.models import Game, Favorite
+from games.views import home_view, dashboard_view
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie que le nombre de requêtes SQL des listes de jeux ne dépend pas du nombre de jeux. "
+        "Les données de test sont créées dans une transaction annulée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5,50,200', help="Nombres de jeux à comparer (séparés par des virgules).")
+
+    def _count(self, view, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        # Sans cache de pages : on mesure les requêtes d'un rendu complet
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            with CaptureQueriesContext(connection) as ctx:
+                view(request)
+        return len(ctx.captured_queries)
+
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options['sizes'].split(',')]
+        results = {'home': [], 'dashboard': []}
+        try:
+            with transaction.atomic():
+                owner = User.objects.create_user('bench-queries-owner')
+                fans = [User.objects.create_user(f'bench-queries-fan{i}') for i in range(3)]
+                created = 0
+                for size in sizes:
+                    games = Game.objects.bulk_create([
+                        Game(user=owner, title=f"Jeu {i}", ambiance="Sombre", keywords="k", is_public=True)
+                        for i in range(created, size)
+                    ])
+                    Favorite.objects.bulk_create([Favorite(user=fan, game=game) for game in games for fan in fans])
+                    created = size
+                    results['home'].append(self._count(home_view, AnonymousUser()))
+                    results['dashboard'].append(self._count(dashboard_view, owner))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        flat = True
+        for view, counts in results.items():
+            self.stdout.write(f"{view}: " + ", ".join(f"{n} jeux -> {c} requêtes" for n, c in zip(sizes, counts)))
+            flat = flat and len(set(counts)) == 1
+        if not flat:
+            raise CommandError("Le nombre de requêtes augmente avec le nombre de jeux (N+1).")
+        self.stdout.write(self.style.SUCCESS("OK : nombre de requêtes constant."))
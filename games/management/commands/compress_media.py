@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from games.images import store_image
+from games.models import Game
+
+
+class Command(BaseCommand):
+    help = "Convertit les anciennes images PNG des jeux en images compressées avec déclinaisons."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-originals', action='store_true', help="Supprimer les PNG une fois convertis.")
+
+    def handle(self, *args, **options):
+        converted = {}
+        for game in Game.objects.all().iterator():
+            changed = []
+            for field in ('character_image_url', 'environment_image_url'):
+                url = getattr(game, field) or ''
+                if not (url.startswith(settings.MEDIA_URL) and url.endswith('.png')):
+                    continue
+                filename = url[len(settings.MEDIA_URL):]
+                if filename not in converted:
+                    path = os.path.join(settings.MEDIA_ROOT, filename)
+                    if not os.path.exists(path):
+                        continue
+                    with open(path, 'rb') as f:
+                        converted[filename] = store_image(f.read(), os.path.splitext(filename)[0].split('_')[0])
+                setattr(game, field, converted[filename])
+                changed.append(field)
+            if changed:
+                game.save(update_fields=changed)
+                self.stdout.write(f"{game.pk}: {game.title}")
+        if options['delete_originals']:
+            for filename in converted:
+                os.remove(os.path.join(settings.MEDIA_ROOT, filename))
+        self.stdout.write(f"{len(converted)} image(s) convertie(s).")
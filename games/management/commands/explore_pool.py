@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from games import explore_pool
+
+
+class Command(BaseCommand):
+    help = "Affiche les métriques du stock d'aperçus d'exploration, ou le remplit (--prefill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefill', action='store_true', help="Remplir le stock avant un pic de trafic.")
+        parser.add_argument('--target', type=int, default=None, help="Profondeur visée (défaut: GAMEFORGE_EXPLORE_POOL_TARGET).")
+        parser.add_argument('--no-cache', action='store_true', help="Ignorer le cache LLM pour varier les aperçus.")
+
+    def handle(self, *args, **options):
+        if options['prefill']:
+            added = explore_pool.refill(
+                target=options['target'],
+                use_cache=not options['no_cache'],
+                on_item=lambda item: self.stdout.write(f"+ {item}"),
+            )
+            self.stdout.write(f"{added} aperçu(s) ajouté(s).")
+        for key, value in explore_pool.metrics().items():
+            self.stdout.write(f"{key}: {value}")
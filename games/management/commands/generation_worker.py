@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from games import explore_pool, json_output
+from games.jobs import claim_next, reap_stale, run_job
+from games.llm_cache import get_cache
+
+
+class Command(BaseCommand):
+    help = "Dépile et exécute les générations IA en attente (GenerationJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Vider la file puis s'arrêter.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Secondes entre deux lectures de la file vide.")
+        parser.add_argument('--no-warmup', action='store_true', help="Ne pas précharger les backends d'inférence (texte et images).")
+        parser.add_argument('--no-explore-pool', action='store_true', help="Ne pas remplir le stock d'exploration pendant les temps morts.")
+
+    def handle(self, *args, **options):
+        if not options['no_warmup']:
+            from games.hf_client import warmup
+            warmup()
+        self.stdout.write("Worker de génération démarré.")
+        while True:
+            for stale in reap_stale():
+                self.stdout.write(f"x  {stale} abandonné (bail GAMEFORGE_JOB_LEASE dépassé), quota rendu")
+            job = claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                # Temps mort : un aperçu à la fois, pour revenir vite vérifier la file
+                if not options['no_explore_pool'] and explore_pool.needs_refill():
+                    self.stdout.write(f"+ stock d'exploration: {explore_pool.refill_one()}")
+                    continue
+                time.sleep(options['poll_interval'])
+                continue
+            self.stdout.write(f"-> {job}")
+            run_job(job)
+            self.stdout.write(f"<- {job}")
+            cache = get_cache()
+            if cache is not None:
+                self.stdout.write(f"   cache LLM: {cache.stats()}")
+            self.stdout.write(f"   sorties JSON: {json_output.stats()}")
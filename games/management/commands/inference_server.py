@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from games.backends import get_image_backend, get_text_backend
+from games.backends.server import parse_address
+from games.inference_server import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Serveur d'inférence local : garde les modèles chargés et regroupe les rendus d'images "
+        "concurrents en lots. Les autres processus l'utilisent avec GAMEFORGE_TEXT_BACKEND / "
+        "GAMEFORGE_IMAGE_BACKEND = server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help="Adresse d'écoute (défaut : GAMEFORGE_INFERENCE_URL).")
+        parser.add_argument('--text-backend', default='local', help="Backend texte servi (local, remote, fake).")
+        parser.add_argument('--image-backend', default='diffusers', help="Backend images servi (diffusers, remote, fake).")
+        parser.add_argument('--max-batch', type=int, default=None, help="Images max par lot (défaut : GAMEFORGE_BATCH_MAX_SIZE).")
+        parser.add_argument('--max-wait-ms', type=float, default=None, help="Attente max d'un lot (défaut : GAMEFORGE_BATCH_MAX_WAIT_MS).")
+        parser.add_argument('--no-warmup', action='store_true', help="Charger les modèles à la première requête.")
+
+    def handle(self, *args, **options):
+        if 'server' in (options['text_backend'], options['image_backend']):
+            raise CommandError("Le serveur ne peut pas servir le backend « server » (il s'appellerait lui-même).")
+        text_backend = get_text_backend(options['text_backend'])
+        image_backend = get_image_backend(options['image_backend'])
+        if not options['no_warmup']:
+            text_backend.warmup()
+            image_backend.warmup()
+        url = options['url'] or settings.GAMEFORGE_INFERENCE_URL
+        server = make_server(
+            parse_address(url), text_backend, image_backend,
+            max_batch=options['max_batch'] or settings.GAMEFORGE_BATCH_MAX_SIZE,
+            max_wait_ms=options['max_wait_ms'] if options['max_wait_ms'] is not None else settings.GAMEFORGE_BATCH_MAX_WAIT_MS,
+        )
+        self.stdout.write(f"Serveur d'inférence sur {url} ({options['text_backend']} / {options['image_backend']})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
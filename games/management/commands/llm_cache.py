@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from games.llm_cache import get_cache
+
+
+class Command(BaseCommand):
+    help = "Affiche la taille du cache des réponses LLM ou le vide (--clear)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Vider tous les niveaux du cache.")
+
+    def handle(self, *args, **options):
+        cache = get_cache()
+        if cache is None:
+            self.stdout.write("Cache LLM désactivé (HF_CACHE=False).")
+            return
+        if options['clear']:
+            cache.clear()
+            self.stdout.write("Cache LLM vidé.")
+        for tier, size in zip(cache.tiers, cache.stats()['entries']):
+            self.stdout.write(f"{tier.__class__.__name__}: {size} entrées")
@@ -0,0 +1,97 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from games.models import Game
+from games.services import persist_generated_game
+from .bench_bulk_import import _sample
+
+# Réglages SQLite d'avant DATABASE_URL (valeurs par défaut de sqlite3 et du module Python)
+LEGACY_SQLITE_PRAGMAS = {"journal_mode": "delete", "synchronous": "full", "busy_timeout": 5000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge de la base configurée (DATABASE_URL) : enregistrements de jeux générés "
+        "et lectures de la liste d'accueil en parallèle. --legacy-sqlite reproduit l'ancien réglage "
+        "SQLite (journal DELETE, synchronous FULL, attente 5 s) pour comparer ; --reconnect ouvre "
+        "une connexion par opération (CONN_MAX_AGE=0, sans pool). Les jeux créés sont supprimés à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help="Threads d'écriture.")
+        parser.add_argument('--readers', type=int, default=8, help="Threads de lecture.")
+        parser.add_argument('--seconds', type=float, default=10, help="Durée du test.")
+        parser.add_argument('--legacy-sqlite', action='store_true', help="Journal DELETE / synchronous FULL / attente 5 s.")
+        parser.add_argument('--reconnect', action='store_true', help="Nouvelle connexion pour chaque opération.")
+
+    def _worker(self, kind, user, deadline, options, stats, lock):
+        latencies, errors, n = [], 0, 0
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        persist_generated_game(user, _sample(n), is_public=True)
+                    else:
+                        list(Game.objects.filter(is_public=True).select_related('user').order_by('-created_at', '-id')[:24])
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    # "database is locked" sous SQLite
+                    errors += 1
+                n += 1
+                if options['reconnect']:
+                    connection.close()
+        finally:
+            connection.close()
+        with lock:
+            stats[kind]['latencies'].extend(latencies)
+            stats[kind]['errors'] += errors
+
+    def handle(self, *args, **options):
+        if options['legacy_sqlite']:
+            # Appliqué par games.signals.configure_sqlite à chaque connexion des threads
+            with override_settings(GAMEFORGE_SQLITE_PRAGMAS=LEGACY_SQLITE_PRAGMAS):
+                connection.close()
+                self._run(options)
+            connection.close()
+        else:
+            self._run(options)
+
+    def _run(self, options):
+        user = User.objects.create_user('loadtest-db')
+        connection.close()
+
+        stats = {kind: {'latencies': [], 'errors': 0} for kind in ('write', 'read')}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+        threads = [
+            threading.Thread(target=self._worker, args=(kind, user, deadline, options, stats, lock))
+            for kind, count in (('write', options['writers']), ('read', options['readers']))
+            for _ in range(count)
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        user.delete()
+
+        self.stdout.write(f"Base : {connection.vendor} ({connection.settings_dict['NAME']}), {elapsed:.1f} s")
+        for kind, label in (('write', 'écritures'), ('read', 'lectures')):
+            latencies = sorted(stats[kind]['latencies'])
+            if latencies:
+                p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+                detail = f"p50 {statistics.median(latencies):7.1f} ms  p95 {p95:7.1f} ms"
+            else:
+                detail = "aucune opération réussie"
+            self.stdout.write(
+                f"{label:10s} {len(latencies) / elapsed:8.1f} op/s  {detail}  erreurs : {stats[kind]['errors']}"
+            )
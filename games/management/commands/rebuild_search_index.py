@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from games.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des jeux."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(f"Index reconstruit ({backend.__class__.__name__}).")
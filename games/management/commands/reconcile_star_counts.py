@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from games import page_cache
+from games.models import Game, Favorite
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule Game.star_count depuis les favoris et corrige les écarts "
+        "(suppressions en cascade, modifications dans l'admin...)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Affiche les écarts sans les corriger.")
+
+    def handle(self, *args, **options):
+        counts = Favorite.objects.filter(game=OuterRef('pk')).order_by().values('game').annotate(n=Count('pk')).values('n')
+        drifted = (
+            Game.objects.annotate(actual=Coalesce(Subquery(counts), 0))
+            .exclude(star_count=F('actual'))
+            .values_list('pk', 'star_count', 'actual')
+        )
+        fixed = 0
+        for pk, stored, actual in list(drifted):
+            self.stdout.write(f"Jeu #{pk} : {stored} -> {actual}")
+            if not options['dry_run']:
+                # Recalculé au moment de l'UPDATE : une star ajoutée entre-temps est prise en compte
+                Game.objects.filter(pk=pk).update(star_count=Coalesce(Subquery(counts), 0))
+                page_cache.invalidate_stars(pk)
+            fixed += 1
+        verb = "à corriger" if options['dry_run'] else "corrigés"
+        self.stdout.write(self.style.SUCCESS(f"{fixed} jeu(x) {verb}."))
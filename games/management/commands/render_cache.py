@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from games.render_cache import get_render_cache
+
+
+class Command(BaseCommand):
+    help = "Affiche la taille du cache des rendus d'images ou le vide (--clear)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Supprimer tous les rendus en cache.")
+
+    def handle(self, *args, **options):
+        cache = get_render_cache()
+        if cache is None:
+            self.stdout.write("Cache des rendus désactivé (GAMEFORGE_RENDER_CACHE_MB=0).")
+            return
+        if options['clear']:
+            cache.clear()
+            self.stdout.write("Cache des rendus vidé.")
+        stats = cache.stats()
+        self.stdout.write(
+            f"{cache.root}: {stats['entries']} rendus, {stats['bytes'] / 1024 / 1024:.1f} / "
+            f"{stats['max_bytes'] / 1024 / 1024:.0f} Mo"
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='genre',
+            field=models.CharField(choices=[('FANTASY', 'Fantasy'), ('SCI-FI', 'Science-Fiction'), ('HORROR', 'Horreur'), ('WESTERN', 'Western'), ('STEAMPUNK', 'Steampunk'), ('MYSTERY', 'Mystère'), ('THRILLER', 'Thriller'), ('ADVENTURE', 'Aventure'), ('ROMANCE', 'Romance'), ('HISTORICAL', 'Historique'), ('CYBERPUNK', 'Cyberpunk'), ('SPACE_OPERA', 'Space Opera'), ('SURVIVAL', 'Survival'), ('NOIR', 'Noir'), ('COMEDY', 'Comédie'), ('DRAMA', 'Drame'), ('UCHRONIA', 'Uchronie'), ('MEDIEVAL', 'Médiéval'), ('SUPERHERO', 'Super-héros'), ('MAGIC', 'Magie'), ('MYTHOLOGY', 'Mythologie'), ('POSTAPO', 'Post-apocalyptique'), ('WAR', 'Guerre'), ('INVESTIGATION', 'Enquête'), ('ESPIONAGE', 'Espionnage'), ('PIRATES', 'Pirates'), ('ANTIQUITY', 'Antiquité'), ('CONTEMPORARY', 'Contemporain'), ('DYSTOPIA', 'Dystopie'), ('FANTASTIC', 'Fantastique'), ('PARANORMAL', 'Paranormal'), ('RPG', 'RPG'), ('FPS', 'FPS'), ('MV', 'Metroidvania'), ('VN', 'Visual Novel'), ('PLAT', 'Platformer'), ('STR', 'Strategy'), ('ACT', 'Action-Adventure')], default='RPG', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('create', 'Création'), ('explore', 'Exploration')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], db_index=True, default='pending', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('progress', models.JSONField(blank=True, default=list)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='games.game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
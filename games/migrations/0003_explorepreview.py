@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExplorePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['claimed_at', 'created_at'], name='explore_pool_stock_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:20
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # SQLite : table FTS5 remplie depuis les jeux existants ; PostgreSQL : index GIN sur le tsvector
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS games_game_fts USING fts5("
+            "game_id UNINDEXED, title, universe, story, locations, characters, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO games_game_fts (game_id, title, universe, story, locations, characters) "
+            "SELECT g.id, g.title, COALESCE(g.universe, ''), COALESCE(g.story, ''), COALESCE(g.locations, ''), "
+            "COALESCE((SELECT group_concat(c.name || ' ' || c.role, ' ') FROM games_character c WHERE c.game_id = g.id), '') "
+            "FROM games_game g"
+        )
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS games_search_vector_gin ON games_gamesearchdocument USING gin (vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS games_game_fts")
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS games_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_explorepreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSearchDocument',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='games.game')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:26
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_today(apps, schema_editor):
+    # Le quota comptait jusqu'ici les jeux créés dans la journée : les compteurs du jour en repartent
+    Game = apps.get_model('games', 'Game')
+    DailyQuota = apps.get_model('games', 'DailyQuota')
+    day = timezone.localdate()
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    counts = (
+        Game.objects.filter(created_at__gte=start, created_at__lt=start + datetime.timedelta(days=1))
+        .values('user_id').annotate(n=models.Count('id'))
+    )
+    DailyQuota.objects.bulk_create([DailyQuota(user_id=row['user_id'], day=day, used=row['n']) for row in counts])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyQuota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_quotas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_today, migrations.RunPython.noop),
+    ]
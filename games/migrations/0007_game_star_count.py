@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_star_counts(apps, schema_editor):
+    # Un seul UPDATE : nombre de favoris de chaque jeu (sous-requête corrélée)
+    Game = apps.get_model('games', 'Game')
+    Favorite = apps.get_model('games', 'Favorite')
+    counts = Favorite.objects.filter(game=OuterRef('pk')).order_by().values('game').annotate(n=Count('pk')).values('n')
+    Game.objects.update(star_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_daily_quota'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='star_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_star_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-star_count', '-id'], name='game_public_starred_idx'),
+        ),
+    ]
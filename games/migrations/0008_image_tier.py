@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0007_game_star_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='image_tier',
+            field=models.CharField(default='standard', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='generationjob',
+            name='kind',
+            field=models.CharField(choices=[('create', 'Création'), ('explore', 'Exploration'), ('upgrade', 'Images haute qualité')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:40
+
+from django.db import migrations
+
+_TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+_CHARACTERS = (
+    "COALESCE((SELECT group_concat(c.name || ' ' || c.role, ' ') FROM games_character c WHERE c.game_id = g.id), '')"
+)
+_FIELDS = "g.title, COALESCE(g.universe, ''), COALESCE(g.story, ''), COALESCE(g.locations, ''), " + _CHARACTERS
+
+
+def use_rowid(apps, schema_editor):
+    # La colonne game_id UNINDEXED obligeait à parcourir toute la table à chaque suppression :
+    # la table est recréée avec le pk du jeu comme rowid
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS games_game_fts")
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE games_game_fts USING fts5(title, universe, story, locations, characters, {_TOKENIZE})"
+    )
+    schema_editor.execute(
+        "INSERT INTO games_game_fts (rowid, title, universe, story, locations, characters) "
+        f"SELECT g.id, {_FIELDS} FROM games_game g"
+    )
+
+
+def use_game_id(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS games_game_fts")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE games_game_fts USING fts5("
+        f"game_id UNINDEXED, title, universe, story, locations, characters, {_TOKENIZE})"
+    )
+    schema_editor.execute(
+        "INSERT INTO games_game_fts (game_id, title, universe, story, locations, characters) "
+        f"SELECT g.id, {_FIELDS} FROM games_game g"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_image_tier'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_rowid, use_game_id),
+    ]
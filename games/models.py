@@ -1,6 +1,17 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 
+class GameQuerySet(models.QuerySet):
+    def with_liked_by(self, user):
+        """Annote is_liked : le jeu est-il dans les favoris de `user` (sous-requête EXISTS)."""
+        if user is None or not user.is_authenticated:
+            return self.annotate(is_liked=Value(False))
+        return self.annotate(
+            is_liked=Exists(Favorite.objects.filter(game=OuterRef('pk'), user=user))
+        )
+
 class Game(models.Model):
     GENRES = [
         ("FANTASY", "Fantasy"),
@@ -57,9 +68,26 @@ class Game(models.Model):
     # Concept art (URLs)
     character_image_url = models.URLField(blank=True, null=True)
     environment_image_url = models.URLField(blank=True, null=True)
+    # Palier de qualité des images (GAMEFORGE_IMAGE_TIERS) : "high" une fois le rendu amélioré demandé
+    image_tier = models.CharField(max_length=20, default="standard")
 
     is_public = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Nombre de favoris, tenu à jour par les vues de favoris (F()) ; réparé par reconcile_star_counts
+    star_count = models.PositiveIntegerField(default=0)
+
+    objects = GameQuerySet.as_manager()
+
+    class Meta:
+        # Un index par chemin de filtre des listes, terminé par le tri (created_at, id) de la pagination.
+        # is_public=True est rendu « WHERE is_public » (sans égalité) : on utilise des index partiels
+        # plutôt qu'une colonne is_public en tête, que le planificateur ne saurait pas exploiter.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True), name='game_public_recent_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='game_user_recent_idx'),
+            models.Index(fields=['genre', '-created_at', '-id'], condition=models.Q(is_public=True), name='game_genre_public_recent_idx'),
+            models.Index(fields=['-star_count', '-id'], condition=models.Q(is_public=True), name='game_public_starred_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -81,3 +109,88 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ('user', 'game')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='favorite_user_recent_idx'),
+        ]
+
+class GenerationJob(models.Model):
+    """Génération IA exécutée hors requête HTTP par le worker (manage.py generation_worker)."""
+    KIND_CREATE = "create"
+    KIND_EXPLORE = "explore"
+    KIND_UPGRADE = "upgrade"
+    KINDS = [
+        (KIND_CREATE, "Création"),
+        (KIND_EXPLORE, "Exploration"),
+        (KIND_UPGRADE, "Images haute qualité"),
+    ]
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUSES = [
+        (STATUS_PENDING, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_DONE, "Terminé"),
+        (STATUS_FAILED, "Échec"),
+    ]
+    STAGES = ["universe", "story", "locations", "characters", "images"]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_jobs')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING, db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    # Étapes terminées, dans l'ordre (cf. STAGES)
+    progress = models.JSONField(default=list, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default="")
+    game = models.ForeignKey(Game, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def stages(self):
+        # Le rendu haute qualité d'un jeu enregistré ne refait que les images
+        return ["images"] if self.kind == self.KIND_UPGRADE else self.STAGES
+
+    @property
+    def percent(self):
+        return int(100 * len(self.progress) / len(self.stages))
+
+class ExplorePreview(models.Model):
+    """Aperçu d'exploration pré-généré, en stock jusqu'à ce qu'une requête le consomme."""
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['claimed_at', 'created_at'], name='explore_pool_stock_idx')]
+
+    def __str__(self):
+        return self.payload.get('title', f"Aperçu #{self.pk}")
+
+class DailyQuota(models.Model):
+    """Générations consommées par un utilisateur sur une journée (cf. games/quota.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_quotas')
+    day = models.DateField()
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'day')
+
+    def __str__(self):
+        return f"{self.user} {self.day}: {self.used}"
+
+class GameSearchDocument(models.Model):
+    """Vecteur tsvector d'un jeu, utilisé par le backend de recherche PostgreSQL (cf. games/search.py)."""
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    vector = SearchVectorField(null=True)
+
+    def __str__(self):
+        return f"Index de recherche: {self.game_id}"
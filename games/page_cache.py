@@ -0,0 +1,100 @@
+"""
+Cache des pages publiques (backend CACHES, cf. CACHE_URL dans settings.py).
+
+- Listes de l'accueil : fragment HTML des cartes et curseur suivant, par filtres. La clé
+  contient une version : celle du genre pour une liste filtrée par genre, la version
+  globale sinon. Un jeu modifié incrémente la version globale et celle de son genre ;
+  les listes des autres genres restent en cache. Les listes triées par stars ont leur
+  propre version, incrémentée aussi à chaque star.
+- Nombres de stars : hors du fragment (marqueur <!--stars:id-->), une clé par jeu ;
+  une star n'invalide que la clé du jeu concerné.
+- Détail d'un jeu : fragment {% cache %} du template, clé incluant la version du jeu.
+"""
+import hashlib
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+STAR_MARK_RE = re.compile(r"<!--stars:(\d+)-->")
+
+
+def timeout():
+    return getattr(settings, "GAMEFORGE_CACHE_TIMEOUT", 60)
+
+
+def _version(scope):
+    # time_ns : après une éviction, la nouvelle version ne peut pas reprendre une ancienne valeur
+    return cache.get_or_set(f"version:{scope}", time.time_ns, None)
+
+
+def _bump(scope):
+    cache.set(f"version:{scope}", time.time_ns(), None)
+
+
+def listing_key(request):
+    genre = request.GET.get("genre", "").strip()
+    params = [request.GET.get(name, "").strip() for name in ("q", "genre", "date", "sort", "cursor")]
+    digest = hashlib.sha1(json.dumps(params).encode()).hexdigest()
+    if request.GET.get("sort") == "stars":
+        # L'ordre dépend des stars : versions propres, incrémentées à chaque star
+        scope = "listing:stars"
+    else:
+        scope = f"listing:{genre}" if genre else "listing"
+    return f"{scope}:{_version(scope)}:{digest}"
+
+
+def get_listing(key):
+    return cache.get(key)
+
+
+def set_listing(key, html, next_cursor):
+    value = {"html": str(html), "next_cursor": next_cursor}
+    cache.set(key, value, timeout())
+    return value
+
+
+def invalidate_listings(genres):
+    _bump("listing")
+    _bump("listing:stars")
+    for genre in set(genres):
+        _bump(f"listing:{genre}")
+
+
+def game_version(pk):
+    return _version(f"game:{pk}")
+
+
+def invalidate_game(pk, genre):
+    invalidate_listings([genre])
+    _bump(f"game:{pk}")
+
+
+def star_counts(ids):
+    """{id: nombre de stars} ; les absents du cache sont lus en une requête puis mis en cache."""
+    keys = {f"stars:{pk}": pk for pk in ids}
+    counts = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    missing = [pk for pk in ids if pk not in counts]
+    if missing:
+        from .models import Game
+        fresh = dict(Game.objects.filter(pk__in=missing).values_list("pk", "star_count"))
+        cache.set_many({f"stars:{pk}": fresh.get(pk, 0) for pk in missing}, timeout())
+        counts.update(fresh)
+    return counts
+
+
+def fill_stars(html):
+    """Remplace les marqueurs <!--stars:id--> par les nombres de stars à jour."""
+    ids = {int(pk) for pk in STAR_MARK_RE.findall(html)}
+    if not ids:
+        return mark_safe(html)
+    counts = star_counts(ids)
+    return mark_safe(STAR_MARK_RE.sub(lambda m: str(counts.get(int(m.group(1)), 0)), html))
+
+
+def invalidate_stars(pk):
+    cache.delete(f"stars:{pk}")
+    _bump("listing:stars")
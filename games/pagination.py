@@ -0,0 +1,83 @@
+"""
+Pagination par curseur (keyset) : la page suivante est filtrée sur les valeurs de tri du
+dernier élément affiché (WHERE (created_at, id) < (…)), au lieu d'un OFFSET qui relit toutes
+les lignes précédentes. Le coût d'une page reste constant quelle que soit sa profondeur.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+def _json_default(value):
+    # isoformat complet : DjangoJSONEncoder tronque les microsecondes, ce qui fausserait l'égalité
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(values):
+    raw = json.dumps(values, default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _model_field(model, path):
+    """Champ du modèle pour un chemin "a__b", None pour une annotation."""
+    field = None
+    for part in path.split("__"):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _value(obj, path):
+    for part in path.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+def keyset_page(queryset, ordering=("-created_at", "-id"), cursor=None, page_size=None):
+    """
+    Retourne (éléments, curseur_suivant). `ordering` doit être total (terminer par l'id) ;
+    curseur_suivant vaut None sur la dernière page. Un curseur invalide renvoie la première page.
+    """
+    page_size = page_size or getattr(settings, "GAMEFORGE_PAGE_SIZE", 24)
+    fields = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    values = _decode(cursor) if cursor else None
+    if values is not None and len(values) == len(fields):
+        converted = []
+        for (name, _), value in zip(fields, values):
+            field = _model_field(queryset.model, name)
+            converted.append(field.to_python(value) if field is not None and value is not None else value)
+        # (f1, f2, …) après le curseur, dans l'ordre lexicographique du tri
+        condition = Q()
+        for i, (name, desc) in enumerate(fields):
+            step = Q(**{f"{name}__{'lt' if desc else 'gt'}": converted[i]})
+            for j, (prev_name, _) in enumerate(fields[:i]):
+                step &= Q(**{prev_name: converted[j]})
+            condition |= step
+        queryset = queryset.filter(condition)
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = _encode([_value(items[-1], name) for name, _ in fields])
+    return items, next_cursor
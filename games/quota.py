@@ -0,0 +1,85 @@
+"""
+Quota quotidien de générations : un compteur par (utilisateur, jour) dans DailyQuota.
+
+La réservation est un UPDATE conditionnel (used < limite) : deux requêtes simultanées ne
+peuvent pas dépasser la limite. Une génération qui échoue rend sa réservation (refund).
+Limites par offre : GAMEFORGE_PLAN_LIMITS associe un nom de groupe à sa limite, les
+utilisateurs sans groupe listé ont GAMEFORGE_DAILY_LIMIT.
+
+La limite et l'usage du jour affichés dans les templates sont gardés dans le cache (CACHES) :
+le widget de quota ne coûte pas de requête. reserve/refund effacent l'usage mis en cache,
+un changement de groupes efface la limite (games/signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyQuota
+
+# Durée de vie (secondes) de la limite et de l'usage en cache, borne des écarts après une
+# modification hors de ce module (admin)
+CACHE_TIMEOUT = 300
+
+
+def _limit_key(user_pk):
+    return f"quota:limit:{user_pk}"
+
+
+def _usage_key(user_pk, day):
+    return f"quota:used:{user_pk}:{day.isoformat()}"
+
+
+def limit_for(user):
+    """Limite quotidienne de l'utilisateur : la plus haute de ses offres (mémorisée sur l'objet user et en cache)."""
+    if not hasattr(user, "_gameforge_quota_limit"):
+        limit = cache.get(_limit_key(user.pk))
+        if limit is None:
+            plans = getattr(settings, "GAMEFORGE_PLAN_LIMITS", {})
+            limits = [plans[name] for name in user.groups.filter(name__in=plans).values_list("name", flat=True)]
+            limit = max(limits, default=settings.GAMEFORGE_DAILY_LIMIT)
+            cache.set(_limit_key(user.pk), limit, CACHE_TIMEOUT)
+        user._gameforge_quota_limit = limit
+    return user._gameforge_quota_limit
+
+
+def forget_limit(user_pk):
+    """Groupes modifiés : la limite sera recalculée."""
+    cache.delete(_limit_key(user_pk))
+
+
+def _forget_usage(user, day):
+    key = _usage_key(user.pk, day)
+    cache.delete(key)
+    # Et après le commit : une lecture concurrente a pu remettre en cache la valeur d'avant
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def reserve(user):
+    """Consomme une génération ; retourne le jour réservé (à passer à refund) ou None si la limite est atteinte."""
+    day = timezone.localdate()
+    limit = limit_for(user)
+    with transaction.atomic():
+        quota, _ = DailyQuota.objects.get_or_create(user=user, day=day)
+        reserved = DailyQuota.objects.filter(pk=quota.pk, used__lt=limit).update(used=F("used") + 1)
+    if reserved:
+        _forget_usage(user, day)
+    return day if reserved else None
+
+
+def refund(user, day):
+    """Rend une génération réservée le jour `day` (génération échouée)."""
+    if DailyQuota.objects.filter(user=user, day=day, used__gt=0).update(used=F("used") - 1):
+        _forget_usage(user, day)
+
+
+def usage(user):
+    """{"limit", "used", "remaining"} pour aujourd'hui ; sans requête quand le cache est chaud."""
+    limit = limit_for(user)
+    day = timezone.localdate()
+    used = cache.get(_usage_key(user.pk, day))
+    if used is None:
+        used = DailyQuota.objects.filter(user=user, day=day).values_list("used", flat=True).first() or 0
+        cache.set(_usage_key(user.pk, day), used, CACHE_TIMEOUT)
+    return {"limit": limit, "used": used, "remaining": max(limit - used, 0)}
@@ -0,0 +1,148 @@
+"""
+Cache des rendus d'images, adressé par contenu.
+
+La clé est un hash de (backend, modèle, prompt, seed, taille, étapes, réglages du palier) :
+avec un seed fixé, le même rendu ne repasse pas par le modèle. Les PNG sont des fichiers
+GAMEFORGE_RENDER_CACHE_DIR/<2 premiers caractères>/<clé>.png, partagés entre processus ; le
+dossier est hors de MEDIA_ROOT, qui est servi publiquement (rendus de jeux privés). La date
+de modification sert d'ordre LRU (rafraîchie à chaque hit) ; au-delà de
+GAMEFORGE_RENDER_CACHE_MB, les moins récemment utilisés sont supprimés.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from django.conf import settings
+
+
+def make_key(backend: str, model: str, prompt: str, seed: int, width: int, height: int, steps, options: dict, upscale=None) -> str:
+    payload = {
+        "backend": backend, "model": model, "prompt": prompt, "seed": seed, "size": [width, height],
+        "steps": steps, "options": options, "upscale": list(upscale) if upscale else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Taille totale estimée : recalculée depuis le disque au premier ajout et à chaque éviction
+        self._size = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            # Absent, ou supprimé entre-temps par l'éviction d'un autre processus
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        """[(mtime, taille, chemin)] des rendus en cache."""
+        files = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self) -> None:
+        # Appelé sous self._lock ; descend à 90 % du plafond pour ne pas évincer à chaque ajout
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = self._files()
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_UNSET = object()
+_cache = _UNSET
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """Cache configuré par GAMEFORGE_RENDER_CACHE_DIR et GAMEFORGE_RENDER_CACHE_MB (0 = désactivé)."""
+    global _cache
+    with _cache_lock:
+        if _cache is _UNSET:
+            max_mb = getattr(settings, "GAMEFORGE_RENDER_CACHE_MB", 1024)
+            root = str(settings.GAMEFORGE_RENDER_CACHE_DIR)
+            _cache = RenderCache(root, int(max_mb * 1024 * 1024)) if max_mb > 0 else None
+        return _cache
+
+
+def set_render_cache(cache: Optional[RenderCache]) -> None:
+    """Remplace le cache du processus (autre emplacement, tests, désactivation)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
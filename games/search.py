@@ -0,0 +1,182 @@
+"""
+Recherche plein texte sur les jeux (titre, univers, scénario, lieux, personnages).
+
+Deux backends selon la base :
+- SQLite : table virtuelle FTS5 games_game_fts (rowid = pk du jeu, tokenizer unicode61 sans
+  accents), classement bm25 ;
+- PostgreSQL : GameSearchDocument.vector (tsvector, index GIN), classement ts_rank,
+  configuration GAMEFORGE_SEARCH_CONFIG (par défaut "french").
+L'index est tenu à jour par les signaux (games/signals.py) et reconstruit par
+`manage.py rebuild_search_index`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import Game, Character
+
+FTS_TABLE = "games_game_fts"
+# rowid de la table FTS = pk du jeu : mise à jour et suppression par rowid, sans parcourir l'index
+FTS_COLUMNS = "title, universe, story, locations, characters"
+# Poids bm25 par colonne : title, universe, story, locations, characters
+FTS_WEIGHTS = (10.0, 3.0, 1.0, 2.0, 5.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _limit():
+    return getattr(settings, "GAMEFORGE_SEARCH_LIMIT", 500)
+
+
+def _pk_subquery(queryset):
+    """(sql, params) de la sous-requête des pk de `queryset`, pour un filtre IN en SQL brut."""
+    return queryset.order_by().values("pk").query.sql_with_params()
+
+
+def _characters_text(game):
+    return " ".join(f"{ch.name} {ch.role}" for ch in game.characters.all())
+
+
+class SQLiteFTSBackend:
+    @staticmethod
+    def match_expression(q):
+        # Chaque mot devient un préfixe entre guillemets : pas d'injection de syntaxe FTS5
+        tokens = _TOKEN_RE.findall(q.lower())
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def index(self, game):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [game.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) VALUES (%s, %s, %s, %s, %s, %s)",
+                [game.pk, game.title, game.universe or "", game.story or "", game.locations or "", _characters_text(game)],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+    def rebuild(self):
+        game_table, character_table = Game._meta.db_table, Character._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) "
+                f"SELECT g.id, g.title, COALESCE(g.universe, ''), COALESCE(g.story, ''), COALESCE(g.locations, ''), "
+                f"COALESCE((SELECT group_concat(c.name || ' ' || c.role, ' ') FROM {character_table} c WHERE c.game_id = g.id), '') "
+                f"FROM {game_table} g"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+    def ranked_ids(self, q, queryset, limit):
+        expression = self.match_expression(q)
+        if not expression:
+            return []
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        # Jeux du queryset en sous-requête : la limite porte sur les résultats visibles par l'appelant
+        scope_sql, scope_params = _pk_subquery(queryset)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({scope_sql}) "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [expression, *scope_params, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend:
+    def _config(self):
+        return getattr(settings, "GAMEFORGE_SEARCH_CONFIG", "french")
+
+    def _vector(self, title, universe, story, locations, characters):
+        from django.contrib.postgres.search import SearchVector
+        from django.db.models import TextField
+        config = self._config()
+
+        def part(text, weight):
+            return SearchVector(Value(text or "", output_field=TextField()), config=config, weight=weight)
+
+        return part(title, "A") + part(characters, "A") + part(universe, "B") + part(locations, "B") + part(story, "C")
+
+    def index(self, game):
+        from .models import GameSearchDocument
+        GameSearchDocument.objects.update_or_create(
+            game=game,
+            defaults={"vector": self._vector(game.title, game.universe, game.story, game.locations, _characters_text(game))},
+        )
+
+    def remove(self, pk):
+        from .models import GameSearchDocument
+        GameSearchDocument.objects.filter(game_id=pk).delete()
+
+    def rebuild(self):
+        from .models import GameSearchDocument
+        GameSearchDocument.objects.all().delete()
+        for game in Game.objects.prefetch_related("characters").iterator(chunk_size=500):
+            self.index(game)
+
+    def ranked_ids(self, q, queryset, limit):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        from django.db.models import F
+        from .models import GameSearchDocument
+        query = SearchQuery(q, config=self._config(), search_type="websearch")
+        return list(
+            GameSearchDocument.objects.filter(vector=query, game__in=queryset.order_by().values("pk"))
+            .annotate(rank=SearchRank(F("vector"), query))
+            .order_by("-rank")
+            .values_list("game_id", flat=True)[:limit]
+        )
+
+
+class NullBackend:
+    """Autres bases : recherche par titre, sans index dédié."""
+
+    def index(self, game):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def ranked_ids(self, q, queryset, limit):
+        return list(
+            queryset.filter(title__icontains=q).order_by("-created_at").values_list("pk", flat=True)[:limit]
+        )
+
+
+def get_backend():
+    if connection.vendor == "sqlite":
+        return SQLiteFTSBackend()
+    if connection.vendor == "postgresql":
+        return PostgresBackend()
+    return NullBackend()
+
+
+def index_game(game):
+    get_backend().index(game)
+
+
+def remove_game(pk):
+    get_backend().remove(pk)
+
+
+def rebuild_index():
+    get_backend().rebuild()
+
+
+def search_games(queryset, q):
+    """
+    Restreint `queryset` aux jeux correspondant à `q` et annote search_rank (0 = le plus
+    pertinent) ; à paginer sur ("search_rank", "id"). Le classement et GAMEFORGE_SEARCH_LIMIT
+    portent sur `queryset` : appliquer les autres filtres avant la recherche.
+    """
+    ids = get_backend().ranked_ids(q, queryset, _limit())
+    if not ids:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+    return queryset.filter(pk__in=ids).annotate(
+        search_rank=Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+    )
@@ -0,0 +1,65 @@
+"""
+Enregistrement des jeux générés (vues, worker, imports).
+
+Un jeu et ses personnages sont écrits dans une seule transaction, les personnages en un
+seul INSERT (bulk_create). Les images sont déjà stockées (images.store_image) : le jeu ne
+garde que leurs URL, et un fichier orphelin après un rollback est sans conséquence
+(noms dérivés du contenu, réutilisés au prochain rendu identique).
+"""
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from . import page_cache, search
+from .models import Game, Character
+
+# Clés d'un aperçu généré (cf. ai.generate_random_game) recopiées sur le Game
+GAME_FIELDS = (
+    "title", "genre", "ambiance", "keywords", "references", "universe", "story", "locations",
+    "character_image_url", "environment_image_url", "image_tier",
+)
+
+
+def _game(user, data, is_public):
+    # Clé absente (aperçus antérieurs à un champ) : valeur par défaut du modèle
+    return Game(user=user, is_public=is_public, **{field: data[field] for field in GAME_FIELDS if field in data})
+
+
+def _characters(game, characters):
+    return [
+        Character(
+            game=game, name=ch.get("name", ""), role=ch.get("role", ""),
+            abilities=ch.get("abilities", ""), motivation=ch.get("motivation", ""),
+        )
+        for ch in characters or []
+    ]
+
+
+def persist_generated_game(user, data, is_public=False):
+    """Crée le jeu décrit par `data` (champs de GAME_FIELDS + "characters") ; tout ou rien."""
+    with transaction.atomic():
+        game = _game(user, data, is_public)
+        game.save()
+        Character.objects.bulk_create(_characters(game, data.get("characters")))
+        # bulk_create n'émet pas post_save : l'index de recherche est mis à jour ici
+        search.index_game(game)
+    return game
+
+
+def persist_generated_games(user, items, is_public=False, batch_size=500):
+    """Import en masse : jeux et personnages par lots (sans signaux), index de recherche mis à jour ensuite."""
+    games = []
+    with transaction.atomic():
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            created = Game.objects.bulk_create([_game(user, data, is_public) for data in batch])
+            Character.objects.bulk_create(
+                [ch for game, data in zip(created, batch) for ch in _characters(game, data.get("characters"))],
+                batch_size=batch_size,
+            )
+            prefetch_related_objects(created, "characters")
+            for game in created:
+                search.index_game(game)
+            games.extend(created)
+    # Pas de post_save non plus : une seule invalidation des listes pour tout l'import
+    page_cache.invalidate_listings(game.genre for game in games)
+    return games
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Game, Character
+from . import page_cache, quota, search
+
+
+def _invalidate_on_commit(game):
+    # Après le commit : une requête concurrente ne peut pas remettre en cache l'ancien état
+    # (pk lu maintenant : delete() le remet à None)
+    pk, genre = game.pk, game.genre
+    transaction.on_commit(lambda: page_cache.invalidate_game(pk, genre))
+
+
+@receiver(post_save, sender=Game)
+def index_game_on_save(sender, instance, **kwargs):
+    search.index_game(instance)
+    _invalidate_on_commit(instance)
+
+
+@receiver(post_delete, sender=Game)
+def unindex_game_on_delete(sender, instance, **kwargs):
+    search.remove_game(instance.pk)
+    _invalidate_on_commit(instance)
+
+
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Character)
+def reindex_game_on_character_change(sender, instance, **kwargs):
+    game = Game.objects.filter(pk=instance.game_id).first()
+    if game is not None:
+        search.index_game(game)
+        _invalidate_on_commit(game)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def forget_quota_limit_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Offre changée : limite de quota recalculée (instance = user, ou groupe si modifié côté groupe)
+    if action in ("post_add", "post_remove"):
+        user_pks = pk_set if reverse else [instance.pk]
+    elif action == "pre_clear" and reverse:
+        # Membres lus avant qu'ils ne soient retirés du groupe
+        user_pks = list(instance.user_set.values_list("pk", flat=True))
+    elif action == "post_clear" and not reverse:
+        user_pks = [instance.pk]
+    else:
+        return
+    for pk in user_pks:
+        quota.forget_limit(pk)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # WAL : les lectures ne bloquent plus pendant l'écriture d'une génération
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "GAMEFORGE_SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
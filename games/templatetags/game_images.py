@@ -0,0 +1,20 @@
+from django import template
+
+from games.images import renditions
+
+register = template.Library()
+
+
+@register.filter
+def srcset(url):
+    """Attribut srcset des déclinaisons d'une image générée ("" pour une URL externe)."""
+    return ", ".join(f"{u} {w}w" for u, w in renditions(url))
+
+
+@register.filter
+def thumb(url, width=320):
+    """Plus petite déclinaison d'au moins `width` px, ou l'URL d'origine."""
+    for u, w in renditions(url):
+        if w >= int(width):
+            return u
+    return url
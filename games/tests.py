@@ -0,0 +1,247 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import jobs, page_cache, quota
+from .ai import harmonize_names
+from .json_output import FAILED, OK, RECOVERED, parse_json_list, parse_json_object
+from .models import DailyQuota, Favorite, Game, GenerationJob
+from .pagination import keyset_page
+
+
+@override_settings(GAMEFORGE_JOB_LEASE=60, GAMEFORGE_DAILY_LIMIT=3)
+class ReapStaleJobsTests(TestCase):
+    def setUp(self):
+        # Usage du quota mis en cache : pas de valeur héritée d'un autre test (pk réutilisés)
+        cache.clear()
+        self.user = User.objects.create_user("joueur", password="secret")
+
+    def _running_job(self, age):
+        day = quota.reserve(self.user)
+        job = jobs.enqueue(self.user, GenerationJob.KIND_CREATE, {"quota_day": day.isoformat()})
+        GenerationJob.objects.filter(pk=job.pk).update(
+            status=GenerationJob.STATUS_RUNNING, updated_at=timezone.now() - datetime.timedelta(seconds=age)
+        )
+        return job
+
+    def test_stale_running_job_fails_and_refunds_quota(self):
+        job = self._running_job(age=120)
+        self.assertEqual(quota.usage(self.user)["used"], 1)
+
+        reaped = jobs.reap_stale()
+
+        self.assertEqual([j.pk for j in reaped], [job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertTrue(job.error)
+        self.assertEqual(quota.usage(self.user)["used"], 0)
+        # Un second passage ne rend pas le quota deux fois
+        self.assertEqual(jobs.reap_stale(), [])
+        self.assertEqual(DailyQuota.objects.get(user=self.user).used, 0)
+
+    def test_running_job_within_lease_is_kept(self):
+        job = self._running_job(age=10)
+
+        self.assertEqual(jobs.reap_stale(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_RUNNING)
+        self.assertEqual(quota.usage(self.user)["used"], 1)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+class ListQueryCountTests(TestCase):
+    """Nombre de requêtes des listes indépendant du nombre de jeux (pas de N+1), cache de pages désactivé."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user("auteur", password="secret")
+        self.fans = [User.objects.create_user(f"fan{i}", password="secret") for i in range(3)]
+        self.created = 0
+
+    def _grow(self, size):
+        games = Game.objects.bulk_create([
+            Game(user=self.owner, title=f"Jeu {i}", ambiance="Sombre", keywords="k", is_public=True)
+            for i in range(self.created, size)
+        ])
+        Favorite.objects.bulk_create([Favorite(user=fan, game=game) for game in games for fan in self.fans])
+        self.created = size
+
+    def _assert_flat(self, url, user):
+        self.client.force_login(user)
+        self._grow(3)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        # Plus d'une page de jeux : le nombre de requêtes doit rester le même
+        self._grow(60)
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_home(self):
+        self._assert_flat(reverse("home"), self.owner)
+
+    def test_dashboard(self):
+        self._assert_flat(reverse("games:dashboard"), self.owner)
+
+    def test_favorites(self):
+        self._assert_flat(reverse("games:favorites"), self.fans[0])
+
+
+@override_settings(GAMEFORGE_DAILY_LIMIT=2, GAMEFORGE_PLAN_LIMITS={})
+class QuotaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("joueur", password="secret")
+
+    def test_reserve_until_exhausted(self):
+        self.assertIsNotNone(quota.reserve(self.user))
+        self.assertIsNotNone(quota.reserve(self.user))
+        self.assertIsNone(quota.reserve(self.user))
+        self.assertEqual(quota.usage(self.user), {"limit": 2, "used": 2, "remaining": 0})
+
+    def test_refund_frees_a_generation(self):
+        day = quota.reserve(self.user)
+        quota.reserve(self.user)
+        quota.refund(self.user, day)
+        self.assertEqual(quota.usage(self.user)["remaining"], 1)
+        self.assertIsNotNone(quota.reserve(self.user))
+
+    def test_refund_never_goes_below_zero(self):
+        day = quota.reserve(self.user)
+        quota.refund(self.user, day)
+        quota.refund(self.user, day)
+        self.assertEqual(DailyQuota.objects.get(user=self.user, day=day).used, 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("auteur")
+        Game.objects.bulk_create([Game(user=user, title=f"Jeu {i}", ambiance="a", keywords="k") for i in range(5)])
+        # Même created_at pour tous : seul l'id départage
+        Game.objects.update(created_at=timezone.now())
+
+    def test_pages_cover_every_row_once_when_sort_values_tie(self):
+        seen, cursor = [], None
+        while True:
+            items, cursor = keyset_page(Game.objects.all(), cursor=cursor, page_size=2)
+            seen.extend(game.pk for game in items)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Game.objects.order_by("-id").values_list("pk", flat=True)))
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor = keyset_page(Game.objects.all(), page_size=5)
+        self.assertEqual(len(items), 5)
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        first, _ = keyset_page(Game.objects.all(), page_size=2)
+        items, _ = keyset_page(Game.objects.all(), cursor="pas-un-curseur", page_size=2)
+        self.assertEqual(items, first)
+
+
+class PageCacheVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = Game.objects.create(
+            user=User.objects.create_user("auteur"), title="Jeu", genre="Fantasy", ambiance="a", keywords="k",
+        )
+
+    def test_save_bumps_game_and_listing_versions(self):
+        game_version, listing = page_cache.game_version(self.game.pk), page_cache._version("listing")
+        genre_listing = page_cache._version("listing:Fantasy")
+        # Invalidation après le commit (signal post_save)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertNotEqual(page_cache.game_version(self.game.pk), game_version)
+        self.assertNotEqual(page_cache._version("listing"), listing)
+        self.assertNotEqual(page_cache._version("listing:Fantasy"), genre_listing)
+
+    def test_delete_bumps_game_and_listing_versions(self):
+        pk = self.game.pk
+        game_version, listing = page_cache.game_version(pk), page_cache._version("listing")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.delete()
+        self.assertNotEqual(page_cache.game_version(pk), game_version)
+        self.assertNotEqual(page_cache._version("listing"), listing)
+
+    def test_other_genre_listing_is_kept(self):
+        other = page_cache._version("listing:Horreur")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertEqual(page_cache._version("listing:Horreur"), other)
+
+
+class StarCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = Game.objects.create(
+            user=User.objects.create_user("auteur"), title="Jeu", ambiance="a", keywords="k", is_public=True,
+        )
+        self.fans = [User.objects.create_user(f"fan{i}", password="secret") for i in range(2)]
+
+    def _star(self, user, view):
+        self.client.force_login(user)
+        self.client.post(reverse(view, args=[self.game.pk]))
+        self.game.refresh_from_db()
+        return self.game.star_count
+
+    def test_star_and_unstar(self):
+        self.assertEqual(self._star(self.fans[0], "games:favorite"), 1)
+        self.assertEqual(self._star(self.fans[1], "games:favorite"), 2)
+        # Star en double : ni favori ni compteur supplémentaire
+        self.assertEqual(self._star(self.fans[1], "games:favorite"), 2)
+        self.assertEqual(self._star(self.fans[0], "games:unfavorite"), 1)
+        self.assertEqual(self._star(self.fans[0], "games:unfavorite"), 1)
+        self.assertEqual(self.game.star_count, Favorite.objects.filter(game=self.game).count())
+
+    def test_cached_count_follows_stars(self):
+        self.assertEqual(page_cache.star_counts([self.game.pk]), {self.game.pk: 0})
+        self._star(self.fans[0], "games:favorite")
+        self.assertEqual(page_cache.star_counts([self.game.pk]), {self.game.pk: 1})
+
+
+class HarmonizeNamesTests(TestCase):
+    characters = [{"name": "Nyx"}, {"name": "Orin Vale"}]
+
+    def test_names_mapped_in_order_of_appearance(self):
+        story = "Lucas rencontre Emma. Lucas part."
+        self.assertEqual(harmonize_names(story, self.characters), "Nyx rencontre Orin Vale. Nyx part.")
+
+    def test_stopwords_and_character_names_are_kept(self):
+        story = "Puis Lucas suit Nyx. Pendant ce temps Vale attend."
+        self.assertEqual(harmonize_names(story, self.characters), "Puis Nyx suit Nyx. Pendant ce temps Vale attend.")
+
+    def test_heading_lines_are_untouched(self):
+        story = "Acte 1 : Lucas part\n**Lucas et Emma**\nLucas revient."
+        self.assertEqual(harmonize_names(story, self.characters), "Acte 1 : Lucas part\n**Lucas et Emma**\nNyx revient.")
+
+    def test_without_characters_story_is_unchanged(self):
+        self.assertEqual(harmonize_names("Lucas part.", []), "Lucas part.")
+
+
+class JsonOutputTests(TestCase):
+    def test_fenced_list(self):
+        self.assertEqual(parse_json_list('```json\n[{"name": "a"}]\n```'), ([{"name": "a"}], OK))
+
+    def test_wrapped_list(self):
+        self.assertEqual(parse_json_list('{"characters": [{"name": "a"}]}'), ([{"name": "a"}], OK))
+
+    def test_truncated_list_keeps_complete_items(self):
+        raw = 'Voici : {"characters": [{"name": "a"}, {"name": "b"}, {"name": "c", "ro'
+        self.assertEqual(parse_json_list(raw), ([{"name": "a"}, {"name": "b"}], RECOVERED))
+
+    def test_lone_object_needs_required_keys(self):
+        self.assertEqual(parse_json_list('{"characters": []}', required=("name",)), ([], FAILED))
+        self.assertEqual(parse_json_list('{"name": "a"}', required=("name",)), ([{"name": "a"}], OK))
+
+    def test_unreadable_reply_fails(self):
+        self.assertEqual(parse_json_list("Désolé, je ne peux pas."), ([], FAILED))
+
+    def test_truncated_object_keeps_complete_members(self):
+        raw = '```json\n{"universe": "u", "story": "s", "locations": ["x", '
+        self.assertEqual(parse_json_object(raw), ({"universe": "u", "story": "s"}, RECOVERED))
@@ -2,16 +2,20 @@ from django.urls import path
 from .views import (
     home_view, dashboard_view, create_game_view, game_detail_view,
     favorites_view, add_favorite_view, remove_favorite_view,
-    toggle_privacy_view, explore_view
+    toggle_privacy_view, upgrade_images_view, explore_view, explore_stream_view, job_status_view, job_status_json_view
 )
 
 urlpatterns = [
     path('dashboard/', dashboard_view, name='dashboard'),
     path('create/', create_game_view, name='create'),
     path('explore/', explore_view, name='explore'),
+    path('explore/stream/', explore_stream_view, name='explore_stream'),
     path('<int:pk>/', game_detail_view, name='detail'),
     path('<int:pk>/favorite/', add_favorite_view, name='favorite'),
     path('<int:pk>/unfavorite/', remove_favorite_view, name='unfavorite'),
     path('<int:pk>/toggle-privacy/', toggle_privacy_view, name='toggle_privacy'),
+    path('<int:pk>/upgrade-images/', upgrade_images_view, name='upgrade_images'),
     path('favorites/', favorites_view, name='favorites'),
+    path('jobs/<int:pk>/', job_status_view, name='job'),
+    path('jobs/<int:pk>/status.json', job_status_json_view, name='job_status'),
 ]
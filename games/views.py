@@ -1,133 +1,119 @@
-import random
+import asyncio
+import datetime
+import json
 
-def generate_random_prompt():
-    genres = [
-        "Fantasy", "Science-Fiction", "Horreur", "Western", "Steampunk", "Mystère", "Thriller", "Aventure", "Romance", "Historique",
-        "Cyberpunk", "Space Opera", "Survival", "Noir", "Comédie", "Drame", "Uchronie", "Medieval", "Super-héros", "Magie", "Mythologie",
-        "Post-apocalyptique", "Guerre", "Enquête", "Espionnage", "Pirates", "Antiquité", "Contemporain", "Dystopie", "Fantastique", "Paranormal"
-    ]
-    ambiances = [
-        "Sombre", "Lumineux", "Étrange", "Épique", "Dystopique", "Magique", "Post-apocalyptique", "Futuriste", "Gothique", "Pastel",
-        "Organique", "Industriel", "Baroque", "Minimaliste", "Coloré", "Désertique", "Aquatique", "Montagneux", "Urbain", "Rural",
-        "Onirique", "Psychédélique", "Vintage", "Moderne", "Rustique", "Glacial", "Tropical", "Automnal", "Printanier", "Estival", "Hivernal"
-    ]
-    titles = [
-        "La Porte des Ombres", "L'Éveil des Titans", "Le Chant du Vide", "Les Larmes du Dragon", "Le Labyrinthe des Âmes", "La Cité Engloutie",
-        "Le Dernier Oracle", "Les Échos du Passé", "Le Souffle du Néant", "La Couronne de Verre", "Le Pacte des Anciens", "La Nuit des Étoiles",
-        "Le Masque du Silence", "La Prophétie Oubliée", "Le Royaume Brisé", "La Danse des Flammes", "Le Sceptre Interdit", "Les Voiles du Temps",
-        "Le Trône de Cendres", "La Légende des Sables", "Le Cri du Corbeau", "La Route des Mirages", "Le Miroir Fendu", "La Forêt des Secrets"
-    ]
-    keywords = [
-        "voyage temporel", "artefact perdu", "rébellion", "royaume déchu", "créature mythique", "intelligence artificielle", "malédiction",
-        "quête initiatique", "civilisation oubliée", "portail dimensionnel", "pouvoir interdit", "mémoire effacée", "guerre ancestrale",
-        "machine vivante", "esprit vengeur", "monde fracturé", "héritage secret", "alliance improbable", "trahison", "sacrifice", "renaissance",
-        "épidémie", "mutation", "rituel ancien", "prophétie", "chasse au trésor", "exploration spatiale", "conflit familial", "quête de rédemption"
-    ]
-    references = [
-        "Zelda", "Blade Runner", "Dark Souls", "Stranger Things", "Le Seigneur des Anneaux", "Disco Elysium", "Hollow Knight", "Dune",
-        "The Witcher", "Mass Effect", "Game of Thrones", "Star Wars", "Harry Potter", "Bioshock", "Firewatch", "Oxenfree", "Control",
-        "Final Fantasy", "Persona", "Death Stranding", "Lost", "Twin Peaks", "Naruto", "Attack on Titan", "Evangelion", "Matrix"
-    ]
-
-    genre = random.choice(genres)
-    ambiance = random.choice(ambiances)
-    title = random.choice(titles)
-    selected_keywords = ', '.join(random.sample(keywords, k=2))
-    selected_references = ', '.join(random.sample(references, k=2))
-
-    return {
-        'genre': genre,
-        'ambiance': ambiance,
-        'title': title,
-        'keywords': selected_keywords,
-        'references': selected_references
-    }
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib import messages
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseForbidden
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
-from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 
-from .models import Game, Character, Favorite
+from .models import Game, Favorite, GenerationJob
 from .forms import GameForm
-from .ai import generate_all, generate_all as ai_generate_all
+from . import jobs, explore_pool, page_cache, quota
+from .pagination import keyset_page
+from .search import search_games
+from .services import persist_generated_game
 
-def home_view(request):
-    games = Game.objects.filter(is_public=True)
+def _day_range(day):
+    """
+    Bornes [début, lendemain) d'un jour local : filtre created_at__gte/__lt qui exploite
+    les index sur created_at, contrairement à created_at__date (calcul sur chaque ligne).
+    """
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+def _filter_games(games, request):
+    """Applique les filtres q/genre/date et le tri ; retourne (queryset, ordre de pagination)."""
     q = request.GET.get('q', '').strip()
     genre = request.GET.get('genre', '').strip()
     date = request.GET.get('date', '').strip()
-    if q:
-        games = games.filter(title__icontains=q)
+    ordering = ('-created_at', '-id')
+    if request.GET.get('sort') == 'stars':
+        # Compteur dénormalisé : tri sur index, sans GROUP BY sur les favoris
+        ordering = ('-star_count', '-id')
     if genre:
         games = games.filter(genre=genre)
     if date:
-        games = games.filter(created_at__date=date)
-    games = games.order_by('-created_at')
+        try:
+            start, end = _day_range(datetime.date.fromisoformat(date))
+        except ValueError:
+            start = None
+        if start is not None:
+            games = games.filter(created_at__gte=start, created_at__lt=end)
+    if q:
+        # Recherche plein texte en dernier : le classement et sa limite portent sur les jeux déjà filtrés
+        games = search_games(games, q)
+        ordering = ('search_rank', 'id')
+    return games, ordering
+
+def _render_page(request, template, fragment, queryset, key, context=None, ordering=('-created_at', '-id')):
+    """
+    Rend une page de liste paginée par curseur. Avec ?format=json, ne renvoie que le fragment
+    HTML des cartes et le curseur suivant (défilement infini).
+    """
+    items, next_cursor = keyset_page(queryset, ordering, cursor=request.GET.get('cursor'))
+    context = {**(context or {}), key: items, 'next_cursor': next_cursor}
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'html': render_to_string(fragment, context, request=request),
+            'next_cursor': next_cursor,
+        })
+    return render(request, template, context)
+
+def home_view(request):
+    # Fragment des cartes en cache par filtres ; les stars sont insérées à part (page_cache)
+    key = page_cache.listing_key(request)
+    page = page_cache.get_listing(key)
+    if page is None:
+        games, ordering = _filter_games(Game.objects.filter(is_public=True), request)
+        items, next_cursor = keyset_page(games.select_related('user'), ordering, cursor=request.GET.get('cursor'))
+        page = page_cache.set_listing(key, render_to_string('games/_home_cards.html', {'games': items}), next_cursor)
+    cards_html = page_cache.fill_stars(page['html'])
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'html': cards_html, 'next_cursor': page['next_cursor']})
     from .models import Game as GameModel
     genres_list = sorted(GameModel.GENRES, key=lambda x: x[1].lower())
-    return render(request, 'games/home.html', {'games': games, 'request': request, 'genres_list': genres_list})
+    return render(request, 'games/home.html', {
+        'request': request, 'genres_list': genres_list,
+        'cards_html': cards_html, 'next_cursor': page['next_cursor'],
+    })
 
 @login_required
 def dashboard_view(request):
     # Jeux créés par l'utilisateur uniquement
-    games = Game.objects.filter(user=request.user)
-
-    q = request.GET.get('q', '').strip()
-    genre = request.GET.get('genre', '').strip()
-    date = request.GET.get('date', '').strip()
-    if q:
-        games = games.filter(title__icontains=q)
-    if genre:
-        games = games.filter(genre=genre)
-    if date:
-        games = games.filter(created_at__date=date)
-    games = games.order_by('-created_at').prefetch_related('favorited_by')
-
-    # Annoter chaque jeu avec is_liked pour l'utilisateur courant
-    games_list = []
-    for game in games:
-        is_liked = game.favorited_by.filter(user=request.user).exists()
-        games_list.append({'game': game, 'is_liked': is_liked})
+    games, ordering = _filter_games(Game.objects.filter(user=request.user), request)
+    # Nombre de stars et is_liked calculés dans la même requête (pas de requête par jeu)
+    games = games.with_liked_by(request.user)
 
     from .models import Game as GameModel
     genres_list = sorted(GameModel.GENRES, key=lambda x: x[1].lower())
-    return render(request, 'games/dashboard.html', {'games_list': games_list, 'request': request, 'genres_list': genres_list})
-
-def _under_daily_limit(user):
-    today = timezone.now().date()
-    count_today = Game.objects.filter(user=user, created_at__date=today).count()
-    return count_today < settings.GAMEFORGE_DAILY_LIMIT
+    return _render_page(
+        request, 'games/dashboard.html', 'games/_dashboard_cards.html', games, 'games',
+        {'request': request, 'genres_list': genres_list}, ordering=ordering,
+    )
 
 @login_required
 def create_game_view(request):
     if request.method == 'POST':
-        if not _under_daily_limit(request.user):
-            messages.error(request, "Limite quotidienne de génération atteinte. Réessayez demain 🙏")
-            return redirect('games:dashboard')
-
         form = GameForm(request.POST)
         if form.is_valid():
-            game = form.save(commit=False)
-            game.user = request.user
-
-            universe, story, locations, characters, char_img, env_img = ai_generate_all(
-                game.title, game.genre, game.ambiance, game.keywords, game.references
-            )
-            game.universe = universe
-            game.story = story
-            game.locations = locations
-            game.character_image_url = char_img
-            game.environment_image_url = env_img
-            game.save()
-
-            for ch in characters:
-                Character.objects.create(
-                    game=game, name=ch['name'], role=ch['role'],
-                    abilities=ch['abilities'], motivation=ch['motivation']
+            with transaction.atomic():
+                # Réservation avant la génération ; rendue par le worker si le job échoue
+                day = quota.reserve(request.user)
+                if day is None:
+                    messages.error(request, "Limite quotidienne de génération atteinte. Réessayez demain 🙏")
+                    return redirect('games:dashboard')
+                job = jobs.enqueue(
+                    request.user, GenerationJob.KIND_CREATE, {**form.cleaned_data, 'quota_day': day.isoformat()}
                 )
-            messages.success(request, "Jeu généré avec succès 🎉")
-            return redirect('games:detail', pk=game.pk)
+            return redirect('games:job', pk=job.pk)
     else:
         form = GameForm()
     return render(request, 'games/game_form.html', {'form': form})
@@ -141,38 +127,78 @@ def game_detail_view(request, pk):
     is_favorite = False
     if request.user.is_authenticated:
         is_favorite = Favorite.objects.filter(user=request.user, game=game).exists()
-    return render(request, 'games/detail.html', {'game': game, 'is_favorite': is_favorite})
+    return render(request, 'games/detail.html', {
+        'game': game, 'is_favorite': is_favorite,
+        # Contenu généré rendu une fois par version du jeu ({% cache %} du template)
+        'game_version': page_cache.game_version(game.pk), 'cache_timeout': page_cache.timeout(),
+    })
+
+@login_required
+@require_POST
+def upgrade_images_view(request, pk):
+    """Rendu haute qualité des images d'un jeu enregistré (job du worker, compté dans le quota)."""
+    game = get_object_or_404(Game, pk=pk, user=request.user)
+    if game.image_tier == jobs.UPGRADE_TIER:
+        messages.info(request, "Les images sont déjà en haute qualité.")
+        return redirect('games:detail', pk=game.pk)
+    with transaction.atomic():
+        day = quota.reserve(request.user)
+        if day is None:
+            messages.error(request, "Limite quotidienne de génération atteinte. Réessayez demain 🙏")
+            return redirect('games:detail', pk=game.pk)
+        job = jobs.enqueue(
+            request.user, GenerationJob.KIND_UPGRADE, {'game_id': game.pk, 'quota_day': day.isoformat()}
+        )
+    return redirect('games:job', pk=job.pk)
 
 @login_required
 def add_favorite_view(request, pk):
     game = get_object_or_404(Game, pk=pk)
-    Favorite.objects.get_or_create(user=request.user, game=game)
+    with transaction.atomic():
+        _, created = Favorite.objects.get_or_create(user=request.user, game=game)
+        if created:
+            # Incrément en SQL (F()) : pas de perte entre deux stars simultanées
+            Game.objects.filter(pk=game.pk).update(star_count=F('star_count') + 1)
+    if created:
+        page_cache.invalidate_stars(game.pk)
     messages.success(request, "Ajouté aux favoris ⭐")
     return redirect('games:dashboard')
 
 @login_required
 def remove_favorite_view(request, pk):
     game = get_object_or_404(Game, pk=pk)
-    Favorite.objects.filter(user=request.user, game=game).delete()
+    with transaction.atomic():
+        deleted, _ = Favorite.objects.filter(user=request.user, game=game).delete()
+        if deleted:
+            Game.objects.filter(pk=game.pk, star_count__gt=0).update(star_count=F('star_count') - 1)
+    if deleted:
+        page_cache.invalidate_stars(game.pk)
     messages.info(request, "Retiré des favoris.")
     return redirect('games:dashboard')
 
 @login_required
 def favorites_view(request):
-    favorites = Favorite.objects.filter(user=request.user).select_related('game').order_by('-created_at')
-    return render(request, 'games/favorites.html', {'favorites': favorites})
+    favorites = Favorite.objects.filter(user=request.user).select_related('game', 'game__user')
+    return _render_page(request, 'games/favorites.html', 'games/_favorite_cards.html', favorites, 'favorites')
 
 @login_required
 def toggle_privacy_view(request, pk):
     game = get_object_or_404(Game, pk=pk, user=request.user)
     game.is_public = not game.is_public
-    game.save()
+    # Listes et détail invalidés par le signal post_save (games/signals.py) ;
+    # update_fields : ne réécrit pas un star_count lu avant une star concurrente
+    game.save(update_fields=['is_public'])
     messages.info(request, f"Visibilité changée: {'Public' if game.is_public else 'Privé'}")
     return redirect('games:dashboard')
 
 
 @login_required
 def explore_view(request):
+    """
+    Exploration libre. Le quota est décompté à la génération d'un aperçu, quel que soit le
+    chemin (stock pré-généré, job du worker, stream en direct) et rendu si elle échoue ;
+    « Régénérer » coûte donc une génération, l'enregistrement de l'aperçu obtenu ne coûte rien.
+    """
     preview = None
     if request.method == 'POST':
         if request.POST.get('delete') == '1':
@@ -191,77 +217,131 @@ def explore_view(request):
             if not preview:
                 messages.error(request, "Aucun jeu à enregistrer. Veuillez générer un jeu d'abord.")
                 return redirect('games:explore')
-            if not _under_daily_limit(request.user):
-                messages.error(request, "Limite quotidienne atteinte aujourd'hui.")
-                return redirect('games:dashboard')
-            game = Game.objects.create(
-                user=request.user,
-                title=preview['title'], genre=preview['genre'], ambiance=preview['ambiance'], keywords=preview['keywords'],
-                references=preview['references'], universe=preview['universe'], story=preview['story'], locations=preview['locations'],
-                character_image_url=preview['character_image_url'], environment_image_url=preview['environment_image_url'], is_public=False
-            )
-            for ch in preview['characters']:
-                Character.objects.create(
-                    game=game, name=ch['name'], role=ch['role'],
-                    abilities=ch['abilities'], motivation=ch['motivation']
-                )
+            with transaction.atomic():
+                # Aperçu déjà décompté à sa génération ; les aperçus de session antérieurs le sont ici
+                if not preview.get('quota_day') and quota.reserve(request.user) is None:
+                    messages.error(request, "Limite quotidienne atteinte aujourd'hui.")
+                    return redirect('games:dashboard')
+                game = persist_generated_game(request.user, preview, is_public=False)
             messages.success(request, "Aperçu enregistré dans votre tableau de bord.")
             # Nettoyer la session
             del request.session['explore_preview']
             return redirect('games:detail', pk=game.pk)
         else:
-            # Génération du jeu
-            from .ai import generate_characters, generate_universe, generate_story_3_acts, generate_locations, generate_concept_image_urls
-            prompt = generate_random_prompt()
-            genre = prompt['genre']
-            ambiance = prompt['ambiance']
-            title = prompt['title']
-            keywords = prompt['keywords']
-            references = prompt['references']
-
-
-            universe = generate_universe(genre, ambiance, keywords)
-            locations = generate_locations(ambiance)
-            chars = generate_characters()
-            # Générer le scénario avant de passer à l'image
-            story = generate_story_3_acts(title, genre, ambiance, keywords, references)
-            import re
-            def replace_names_in_story(story, chars):
-                names = [ch['name'] for ch in chars]
-                lines = story.splitlines()
-                act_pattern = re.compile(r'^(Acte|\*\*|#)', re.IGNORECASE)
-                name_pattern = r'\b([A-Z][a-zA-Zéèêëàâäôöûüç]{2,})\b'
-                replaced_lines = []
-                generated_names = set(names)
-                for line in lines:
-                    if act_pattern.match(line.strip()):
-                        replaced_lines.append(line)
-                    else:
-                        found = re.findall(name_pattern, line)
-                        new_line = line
-                        replaceable = [n for n in set(found) if n not in generated_names]
-                        for i, old_name in enumerate(replaceable):
-                            new_name = names[i % len(names)]
-                            new_line = re.sub(rf'\b{re.escape(old_name)}\b', new_name, new_line)
-                        replaced_lines.append(new_line)
-                return '\n'.join(replaced_lines)
-            story = replace_names_in_story(story, chars)
-            # Générer les images avec tout le contexte
-            char_img, env_img = generate_concept_image_urls(
-                genre, ambiance, keywords,
-                title=title,
-                characters=chars,
-                locations=locations,
-                story=story
-            )
-
-            preview = {
-                'title': title, 'genre': genre, 'ambiance': ambiance, 'keywords': keywords, 'references': references,
-                'universe': universe, 'story': story, 'locations': locations, 'characters': chars,
-                'character_image_url': char_img, 'environment_image_url': env_img,
-            }
-            request.session['explore_preview'] = preview
+            day = quota.reserve(request.user)
+            if day is None:
+                messages.error(request, "Limite quotidienne atteinte aujourd'hui.")
+                return redirect('games:explore')
+            # Aperçu pré-généré si le stock n'est pas vide, sinon génération par le worker (qui rend
+            # la réservation en cas d'échec)
+            preview = explore_pool.pop()
+            if preview:
+                request.session['explore_preview'] = {**preview, 'quota_day': day.isoformat()}
+                return redirect('games:explore')
+            job = jobs.enqueue(request.user, GenerationJob.KIND_EXPLORE, {
+                'regen': request.POST.get('regen') == '1', 'quota_day': day.isoformat(),
+            })
+            return redirect('games:job', pk=job.pk)
     else:
+        job_id = request.GET.get('job')
+        if job_id:
+            # Aperçu produit par le worker : on le place en session
+            job = get_object_or_404(
+                GenerationJob, pk=job_id, user=request.user,
+                kind=GenerationJob.KIND_EXPLORE, status=GenerationJob.STATUS_DONE
+            )
+            request.session['explore_preview'] = {**job.result, 'quota_day': job.params.get('quota_day')}
+            return redirect('games:explore')
         preview = request.session.get('explore_preview')
 
     return render(request, 'games/explore.html', {'preview': preview})
+
+
+def _job_redirect_url(job):
+    if job.status != GenerationJob.STATUS_DONE:
+        return None
+    if job.kind in (GenerationJob.KIND_CREATE, GenerationJob.KIND_UPGRADE) and job.game_id:
+        return reverse('games:detail', args=[job.game_id])
+    if job.kind == GenerationJob.KIND_EXPLORE:
+        return reverse('games:explore') + f"?job={job.pk}"
+    return None
+
+@login_required
+def job_status_view(request, pk):
+    job = get_object_or_404(GenerationJob, pk=pk, user=request.user)
+    return render(request, 'games/job_status.html', {'job': job, 'stages': job.stages})
+
+@login_required
+def job_status_json_view(request, pk):
+    job = get_object_or_404(GenerationJob, pk=pk, user=request.user)
+    return JsonResponse({
+        'status': job.status,
+        'progress': job.progress,
+        'percent': job.percent,
+        'error': job.error,
+        'redirect_url': _job_redirect_url(job),
+    })
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _explore_events(request, user, use_cache, quota_day):
+    from .ai import stream_random_game
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    # La génération (bloquante) tourne dans un thread ; ses événements remontent par la queue
+    task = loop.run_in_executor(None, lambda: stream_random_game(emit, use_cache=use_cache))
+    task.add_done_callback(lambda _: loop.call_soon_threadsafe(queue.put_nowait, None))
+    delivered = False
+    try:
+        yield ": start\n\n"
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield _sse(*item)
+        try:
+            preview = task.result()
+        except Exception as e:
+            yield _sse('error', {'message': str(e)})
+            return
+        # Génération déjà décomptée : l'enregistrement de cet aperçu ne réserve pas une seconde fois
+        preview['quota_day'] = quota_day.isoformat()
+        # Le middleware de session a déjà répondu : sauvegarde explicite de l'aperçu final
+        request.session['explore_preview'] = preview
+        await sync_to_async(request.session.save)()
+        delivered = True
+        yield _sse('done', {'redirect_url': reverse('games:explore')})
+    finally:
+        # Échec, ou client déconnecté (générateur fermé ou annulé) : l'aperçu n'arrivera jamais
+        # en session, la réservation est rendue (le thread de génération finit dans le vide)
+        if not delivered:
+            await sync_to_async(quota.refund)(user, quota_day)
+
+async def _quota_exceeded_events():
+    yield _sse('error', {'message': "Limite quotidienne atteinte aujourd'hui."})
+
+async def explore_stream_view(request):
+    """
+    Génération d'exploration en direct (Server-Sent Events), servie par gameforge/asgi.py.
+    Elle tourne dans le processus web, hors file de jobs ; comme sur les autres chemins de
+    l'exploration, le quota est réservé avant la génération et rendu si l'aperçu n'est pas
+    livré (échec, client déconnecté).
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden("Connexion requise.")
+    quota_day = await sync_to_async(quota.reserve)(user)
+    if quota_day is None:
+        events = _quota_exceeded_events()
+    else:
+        events = _explore_events(request, user, use_cache=request.GET.get('regen') != '1', quota_day=quota_day)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response